@@ -0,0 +1,83 @@
+"""
+Benchmark of cold start: package import and client construction.
+
+Every cold measurement runs in a fresh interpreter.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_startup.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+RUNS = 10
+NUMBER = 2000
+
+COLD_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import recommendpy
+imported = time.perf_counter()
+from recommendpy import RecommendAPI
+client_imported = time.perf_counter()
+api = RecommendAPI('account')
+constructed = time.perf_counter()
+api.contact
+accessed = time.perf_counter()
+print(json.dumps({
+    'import recommendpy': imported - started,
+    'import RecommendAPI': client_imported - imported,
+    'RecommendAPI()': constructed - client_imported,
+    'first namespace access': accessed - constructed,
+    'total': accessed - started,
+    'modules': [
+        name for name in ('requests', 'httpx', 'asyncio')
+        if name in sys.modules
+    ],
+}))
+'''
+
+
+def cold_start():
+    result = subprocess.run(
+        [sys.executable, '-c', COLD_SCRIPT],
+        check=True, stdout=subprocess.PIPE, env=os.environ
+    )
+    return json.loads(result.stdout)
+
+
+def main():
+    from recommendpy import RecommendAPI
+
+    runs = [cold_start() for _ in range(RUNS)]
+    print('python {}, median of {} cold starts'.format(
+        sys.version.split()[0], RUNS
+    ))
+    for name in runs[0]:
+        if name == 'modules':
+            continue
+        print('{:<28} {:8.2f} ms'.format(
+            name, statistics.median(run[name] for run in runs) * 1000
+        ))
+    print('{:<28} {}'.format(
+        'heavy modules loaded', ', '.join(runs[0]['modules']) or '-'
+    ))
+
+    seconds = timeit.timeit(lambda: RecommendAPI('account'), number=NUMBER)
+    print('{:<28} {:8.2f} us'.format(
+        'warm RecommendAPI()', seconds / NUMBER * 1e6
+    ))
+    seconds = timeit.timeit(
+        lambda: RecommendAPI('account').map_apis(), number=NUMBER
+    )
+    print('{:<28} {:8.2f} us'.format(
+        'warm with map_apis()', seconds / NUMBER * 1e6
+    ))
+
+
+if __name__ == '__main__':
+    main()
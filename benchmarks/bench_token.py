@@ -0,0 +1,54 @@
+"""
+Microbenchmark of auth token checks done by ``check_token`` on every call.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_token.py
+"""
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+
+from recommendpy import RecommendAPI
+from recommendpy.token import REFRESH_LIFETIME_PERCENT, RecommendAPIToken
+
+NUMBER = 200000
+
+
+def legacy_checks(token):
+    # checks as done before deadlines were precomputed
+    now = datetime.utcnow().replace(tzinfo=timezone.utc).timestamp()
+    expired = now >= token.expire_at
+    life_time = token.expire_at - token.created_at
+    now = datetime.utcnow().replace(tzinfo=timezone.utc).timestamp()
+    return expired, now >= (
+        token.created_at + life_time * REFRESH_LIFETIME_PERCENT / 100
+    )
+
+
+def token_checks(token):
+    return token.is_expired, token.need_refresh
+
+
+def report(name, func):
+    seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+    print('{:<28} {:8.3f} us/call'.format(name, seconds / NUMBER * 1e6))
+
+
+def main():
+    now = time.time()
+    token = RecommendAPIToken('token', now + 3600, now)
+    api = RecommendAPI('account', auth_token=token)
+
+    print('python {}'.format(sys.version.split()[0]))
+    report('legacy token checks', lambda: legacy_checks(token))
+    report('token checks', lambda: token_checks(token))
+    report('check_auth_token', api.check_auth_token)
+    print('{:<28} {:8d} bytes'.format(
+        'token size', sys.getsizeof(token)
+    ))
+
+
+if __name__ == '__main__':
+    main()
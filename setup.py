@@ -12,6 +12,18 @@ requires = [
     'requests',
 ]
 
+extras_require = {
+    'async': [
+        'httpx',
+    ],
+    'orjson': [
+        'orjson',
+    ],
+    'parquet': [
+        'pyarrow',
+    ],
+}
+
 
 setup(
     name='recommendpy',
@@ -28,5 +40,6 @@ setup(
     package_dir={'': 'src'},
     include_package_data=True,
     zip_safe=False,
-    install_requires=requires
+    install_requires=requires,
+    extras_require=extras_require,
 )
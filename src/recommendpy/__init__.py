@@ -1,5 +1,19 @@
-from .base import RecommendAPI
-
 __all__ = [
     'RecommendAPI',
+    'AsyncRecommendAPI',
 ]
+
+
+def __getattr__(name):
+    # clients are imported on first access, so importing the package or
+    # its light modules (token, feed, ...) does not import http transports
+    if name == 'RecommendAPI':
+        from .base import RecommendAPI as value
+    elif name == 'AsyncRecommendAPI':
+        from .aio import AsyncRecommendAPI as value
+    else:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name)
+        )
+    globals()[name] = value
+    return value
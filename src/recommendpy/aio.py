@@ -0,0 +1,272 @@
+import asyncio
+import time
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .api.attribute import ATTRIBUTE_TYPES, index_attributes
+from .base import BACKGROUND_REFRESH_RETRY, RecommendAPI
+from .batch import DEFAULT_CONCURRENCY
+from .retry import is_idempotent
+from .exceptions import (
+    RecommendAPIError,
+    RecommendUnauthorizedError,
+)
+
+import logging
+log = logging.getLogger('recommendpy')
+
+
+class AsyncRecommendAPI(RecommendAPI):
+    r"""
+    Asyncio variant of :class:`recommendpy.RecommendAPI`.
+
+    Uses the same api namespaces (``contact``, ``catalog_upload``,
+    ``order``, ...), but all of their methods return awaitables. Requires
+    `httpx <https://www.python-httpx.org/>`_ (``pip install
+    recommendpy[async]``).
+
+    Usage::
+
+        async with AsyncRecommendAPI(account_id, auth_token=token) as api:
+            stores = await api.store()
+            async for contact in api.contact.async_search_iterator():
+                ...
+    """
+
+    is_async = True
+
+    def __init__(self, *args, **kwargs):
+        r"""
+        Initialize AsyncRecommendAPI object.
+
+        :param \*args: positional arguments are passed to
+            :class:`recommendpy.RecommendAPI`.
+        :param session_options: dict of keyword arguments passed to
+            ``httpx.AsyncClient`` (e.g. ``limits``, ``timeout``).
+            Defaults to ``None``.
+        :param \**kwargs: keyword arguments are passed to
+            :class:`recommendpy.RecommendAPI`.
+        """
+        if httpx is None:
+            raise ImportError(
+                'AsyncRecommendAPI requires httpx. '
+                'Install it with `pip install recommendpy[async]`.'
+            )
+        self.session_options = kwargs.pop('session_options', None) or {}
+        self._async_refresh_lock = None
+        super().__init__(*args, **kwargs)
+
+    def create_session(self):
+        return httpx.AsyncClient(
+            headers={
+                'Accept': 'application/json',
+                'Content-Type': 'application/json',
+            },
+            verify=True,
+            **self.session_options
+        )
+
+    async def aclose(self):
+        """Stop background refresh and close underlying connections."""
+        self._closed.set()
+        if self._refresher is not None:
+            self._refresher.cancel()
+        if '_session' in self.__dict__:
+            await self._session.aclose()
+
+    close = aclose
+
+    def __enter__(self):
+        # the client can be closed only by awaiting aclose
+        raise TypeError('Use "async with" with AsyncRecommendAPI.')
+
+    def __exit__(self, *exc_info):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def check_auth_token(self):
+        r"""
+        Make sure a valid auth token is set before calling the api.
+
+        See :func:`recommendpy.RecommendAPI.check_auth_token`.
+        """
+        if not self.is_auth_token_setted:
+            self.set_auth_token()
+        if self.background_refresh and self._refresher is None:
+            self.start_background_refresh()
+
+        token = self.tokens['auth']
+        lock = self.get_refresh_lock()
+        if token.is_expired:
+            async with lock:
+                if self.tokens['auth'] is token:
+                    await self.refresh_auth_token(token)
+        elif token.need_refresh and not lock.locked():
+            async with lock:
+                try:
+                    if self.tokens['auth'] is token:
+                        await self.refresh_auth_token(token)
+                except RecommendAPIError as e:
+                    log.exception(e)
+        if not self.is_auth_token_setted:
+            raise RecommendUnauthorizedError('Set auth token')
+
+    def get_refresh_lock(self):
+        # created lazily, asyncio.Lock must be created inside event loop
+        if self._async_refresh_lock is None:
+            self._async_refresh_lock = asyncio.Lock()
+        return self._async_refresh_lock
+
+    def start_background_refresh(self):
+        r"""
+        Start background refresh of the auth token as asyncio task.
+
+        Called by :func:`check_auth_token` if ``background_refresh``
+        is set.
+        """
+        if self._refresher is None:
+            self._refresher = asyncio.ensure_future(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        delay = self.next_refresh_delay()
+        while not self._closed.is_set():
+            await asyncio.sleep(delay)
+            token = self.tokens.get('auth')
+            try:
+                async with self.get_refresh_lock():
+                    if token is not None and token.need_refresh and \
+                            self.tokens.get('auth') is token:
+                        await self.refresh_auth_token(token)
+            except Exception as e:
+                log.exception(e)
+                delay = BACKGROUND_REFRESH_RETRY
+            else:
+                delay = self.next_refresh_delay()
+
+    async def _authenticate(self, key):
+        self.update_tokens(await self.authenticate(key))
+
+    async def refresh_auth_token(self, token):
+        r"""
+        Refresh auth token and set it.
+
+        A token refreshed by another process is reused, but the credential
+        store is not locked to not block the event loop.
+
+        :param token: current auth token (required).
+        """
+        stored = self.get_stored_auth_token(token)
+        if stored is not None:
+            self.load_tokens()
+            self.set_auth_token(stored)
+            return
+        await self.refresh_token()
+        self.set_auth_token()
+
+    async def refresh_token(self, update_refresh_token=False):
+        refresh_token = self.get_token('refresh')
+        # force update refresh_token
+        if refresh_token.need_refresh:
+            update_refresh_token = True
+        self.update_tokens(
+            await self.authenticate.refresh(
+                refresh_token=refresh_token,
+                update_refresh_token=update_refresh_token
+            ),
+            update_refresh_token=update_refresh_token
+        )
+
+    async def get_attributes(
+        self, entity_types=None, concurrency=DEFAULT_CONCURRENCY, **kw
+    ):
+        r"""
+        Return attributes of several entity types indexed by code.
+
+        See :func:`recommendpy.RecommendAPI.get_attributes`.
+        """
+        entity_types = entity_types or ATTRIBUTE_TYPES
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(entity_type):
+            async with semaphore:
+                return await self.attribute(entity_type).list(**kw)
+
+        results = await asyncio.gather(*map(fetch, entity_types))
+        return {
+            entity_type: index_attributes(attributes)
+            for entity_type, attributes in zip(entity_types, results)
+        }
+
+    async def send_cached(self, name, **args):
+        r"""
+        Send get request through :attr:`cache`.
+
+        See :func:`recommendpy.RecommendAPI.send_cached`.
+        """
+        if self.cache is None or args.get('raw'):
+            return await self.send('get', name, **args)
+        key, entry = self.get_cache_entry(name, args)
+        if entry is not None and entry.is_fresh:
+            return entry.value
+        response = await self.send('get', name, raw=True, **args)
+        return self.cache_response(key, response, entry)
+
+    async def send(
+        self, method, name, data=None, raw=False, stream=False,
+        idempotent=None, **args
+    ):
+        if stream:
+            raise RecommendAPIError(
+                'Streamed responses are not supported by AsyncRecommendAPI.'
+            )
+        self.add_auth_header(args)
+        if data is not None:
+            args['data'] = self.serializer.dumps(data)
+        if self.need_compression(args.get('data')):
+            # do not block the event loop with compression of big bodies
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.compress_body, args
+            )
+        if 'data' in args:
+            args['content'] = args.pop('data')
+        if idempotent is None:
+            idempotent = is_idempotent(method, name)
+        attempt = 0
+        while True:
+            if self.rate_limit is not None:
+                delay = self.rate_limit.reserve(name)
+                if delay:
+                    await asyncio.sleep(delay)
+            started = time.monotonic()
+            try:
+                response = await self._session.request(
+                    method.upper(),
+                    self.service_url(name),
+                    **args
+                )
+            except httpx.HTTPError as e:
+                if self.trace_func:
+                    self.trace(method, name, args, None, started, e, attempt)
+                delay = self.retry_delay(attempt, idempotent, error=e)
+                if delay is None:
+                    raise
+            else:
+                if self.trace_func:
+                    self.trace(
+                        method, name, args, response, started, None, attempt
+                    )
+                delay = self.retry_delay(attempt, idempotent, response)
+                if delay is None:
+                    break
+            attempt += 1
+            self.log_retry(method, name, attempt, delay)
+            await asyncio.sleep(delay)
+        return self.process_response(method, name, args, response, raw)
@@ -3,7 +3,8 @@ from ..exceptions import RecommendAPIError
 
 __all__ = [
     'AttributeAPI',
-    'AttributeStoreMappingAPI'
+    'AttributeStoreMappingAPI',
+    'index_attributes',
 ]
 
 ATTRIBUTE_TYPES = [
@@ -65,6 +66,12 @@ class AttributeStoreMappingAPI(BaseAPI):
         self.endpoint = endpoint
         self.entity_type = entity_type
         self.attribute_code = attribute_code
+        # only store_code changes between calls, format the rest once
+        self._path_prefix, self._path_suffix = endpoint.format(
+            entity_type=entity_type,
+            attribute_code=attribute_code,
+            store_code='{store_code}'
+        ).split('{store_code}')
 
     def get_path(self, identifier):
         r"""
@@ -74,11 +81,7 @@ class AttributeStoreMappingAPI(BaseAPI):
         :return: the formatted string of self.endpoint with entity_type,
             attribute_code and store_code parameters.
         """
-        return self.endpoint.format(
-            entity_type=self.entity_type,
-            attribute_code=self.attribute_code,
-            store_code=identifier
-        )
+        return self._path_prefix + str(identifier) + self._path_suffix
 
     @check_token
     def get(self, identifier, **kw):
@@ -92,9 +95,7 @@ class AttributeStoreMappingAPI(BaseAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
-            'get', self.get_path(identifier), **kw
-        )
+        return self._client.send_cached(self.get_path(identifier), **kw)
 
     @check_token
     def create(self, identifier, data, **kw):
@@ -109,9 +110,8 @@ class AttributeStoreMappingAPI(BaseAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
-            'post', self.get_path(identifier), data, **kw
-        )
+        path = self.get_path(identifier)
+        return self.send_invalidating('post', path, data, prefix=path, **kw)
 
     @check_token
     def delete(self, identifier, **kw):
@@ -125,6 +125,18 @@ class AttributeStoreMappingAPI(BaseAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
-            'delete', self.get_path(identifier), **kw
-        )
+        path = self.get_path(identifier)
+        return self.send_invalidating('delete', path, prefix=path, **kw)
+
+
+def index_attributes(attributes, key='code'):
+    r"""
+    Index attributes by code.
+
+    :param attributes: list of attributes, result of
+        :func:`AttributeAPI.list` (required).
+    :param key: name of field to index by. Defaults to ``code``.
+
+    :return: dict of attributes by code.
+    """
+    return {attribute[key]: attribute for attribute in attributes or []}
@@ -1,37 +1,32 @@
+from collections import deque
 from functools import wraps
 
-from ..exceptions import (
-    RecommendAPIError,
-    RecommendUnauthorizedError,
-)
+from ..cursor import SearchCursor, get_identity
+from ..exceptions import RecommendAPIError
+from ..stream import RecommendResultStream
 
 import logging
 log = logging.getLogger('recommendpy')
 
+SEARCH_PAGE_LIMIT = 3000
+
 
 def check_token(func):
     """Decorator for checking the auth token."""
     @wraps(func)
     def wrapper(api, *args, **kwargs):
-        if not api._client.is_auth_token_setted:
-            api._client.set_auth_token()
-
-        token = api._client.tokens['auth']
-        if token.is_expired:
-            api._client.refresh_token()
-            api._client.set_auth_token()
-        if token.need_refresh:
-            try:
-                api._client.refresh_token()
-                api._client.set_auth_token()
-            except RecommendAPIError as e:
-                log.exception(e)
-        if not api._client.is_auth_token_setted:
-            raise RecommendUnauthorizedError('Set auth token')
+        if api._client.is_async:
+            return _async_check_token(func, api, *args, **kwargs)
+        api._client.check_auth_token()
         return func(api, *args, **kwargs)
     return wrapper
 
 
+async def _async_check_token(func, api, *args, **kwargs):
+    await api._client.check_auth_token()
+    return await func(api, *args, **kwargs)
+
+
 class BaseAPI(object):
     """Base API class."""
 
@@ -67,6 +62,54 @@ class BaseAPI(object):
             url.append(custom)
         return '/'.join(map(str, url))
 
+    def check_sync_client(self):
+        r"""
+        Check that the client is synchronous.
+
+        Chunked uploads send chunks from worker threads and need
+        :class:`recommendpy.RecommendAPI`.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if the client is :class:`recommendpy.AsyncRecommendAPI`.
+        """
+        if self._client.is_async:
+            raise RecommendAPIError(
+                'Chunked uploads are not supported by AsyncRecommendAPI.'
+            )
+
+    def send_invalidating(self, method, path, data=None, prefix=None, **kw):
+        r"""
+        Send request changing objects and invalidate cached results.
+
+        :param method: http method of request (required).
+        :param path: relative path of request (required).
+        :param data: data to send as json. Defaults to ``None``.
+        :param prefix: path of cached results to invalidate.
+            Defaults to ``None`` (self.endpoint).
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :return: result of response.json().
+        """
+        client = self._client
+        if client.cache is None:
+            return client.send(method, path, data, **kw)
+        prefix = prefix or self.endpoint
+        if client.is_async:
+            return _async_send_invalidating(
+                client, prefix, client.send(method, path, data, **kw)
+            )
+        try:
+            return client.send(method, path, data, **kw)
+        finally:
+            client.cache.invalidate(prefix)
+
+
+async def _async_send_invalidating(client, prefix, request):
+    try:
+        return await request
+    finally:
+        client.cache.invalidate(prefix)
+
 
 class ReadAPI(BaseAPI):
     """Generic API for read-only operations."""
@@ -101,9 +144,7 @@ class ReadAPI(BaseAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
-            'get', self.get_path(identifier), **kw
-        )
+        return self._client.send_cached(self.get_path(identifier), **kw)
 
     @check_token
     def list(self, **kw):
@@ -116,9 +157,7 @@ class ReadAPI(BaseAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
-            'get', self.get_path(), **kw
-        )
+        return self._client.send_cached(self.get_path(), **kw)
 
 
 class CRUDAPI(ReadAPI):
@@ -137,7 +176,7 @@ class CRUDAPI(ReadAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
+        return self.send_invalidating(
             'post', self.get_path(identifier), data, **kw
         )
 
@@ -154,7 +193,7 @@ class CRUDAPI(ReadAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
+        return self.send_invalidating(
             'put', self.get_path(identifier), data, **kw
         )
 
@@ -170,11 +209,133 @@ class CRUDAPI(ReadAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
+        return self.send_invalidating(
             'delete', self.get_path(identifier), **kw
         )
 
 
+def _close_page(future):
+    """Release the connection of prefetched streamed page."""
+    if future.cancelled():
+        return
+    try:
+        result = future.result()
+    except Exception:
+        return
+    if isinstance(result, RecommendResultStream):
+        result.close()
+
+
+class SearchIterator(object):
+    r"""
+    Iterator of search results with resumable position.
+
+    Created by :func:`SearchAPI.search_iterator`. Its ``cursor`` is updated
+    before every yielded item, so a cursor saved after an item is processed
+    resumes with the next one. A resumed iterator requests the page of
+    cursor again and drops its yielded items, the identity of the last one
+    is compared with ``cursor.last`` and a mismatch (the results changed
+    since the cursor was saved) is logged.
+    """
+
+    def __init__(
+        self, api, cursor, max_failed=5, concurrency=1, stream=False,
+        key=None
+    ):
+        r"""
+        Initialize SearchIterator object.
+
+        :param api: :class:`SearchAPI` object (required).
+        :param cursor: :class:`recommendpy.cursor.SearchCursor` object
+            (required).
+        :param max_failed: Max attempts count for one search request.
+            Defaults to ``5``.
+        :param concurrency: Max count of pages requested at the same time.
+            Defaults to ``1`` (no prefetching).
+        :param stream: decode pages while they are read.
+            Defaults to ``False``.
+        :param key: name of item field with identity, or function returning
+            identity of item. Defaults to ``None``.
+        """
+        self.api = api
+        self.cursor = cursor
+        self.max_failed = max_failed
+        self.concurrency = concurrency
+        self.stream = stream
+        self.key = key
+        self._items = self._iter_items()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        """Stop iteration and cancel prefetched pages."""
+        self._items.close()
+
+    def _iter_items(self):
+        cursor = self.cursor
+        if cursor.done:
+            return
+        kw = dict(cursor.filters)
+        if self.stream:
+            kw['stream'] = True
+        limit = cursor.limit or SEARCH_PAGE_LIMIT
+        if self.concurrency > 1:
+            pages = self.api._prefetch_pages(
+                cursor.skip, limit, self.max_failed, self.concurrency, kw
+            )
+        else:
+            pages = self.api._iter_pages(
+                cursor.skip, limit, self.max_failed, kw
+            )
+        drop = cursor.position
+        for skip, result in pages:
+            if isinstance(result, RecommendResultStream):
+                with result:
+                    for item in self._iter_page(skip, result, result, drop):
+                        yield item
+            else:
+                for item in self._iter_page(
+                    skip, result, result.get('data', []), drop
+                ):
+                    yield item
+            drop = 0
+        cursor.done = True
+
+    def _iter_page(self, skip, result, items, drop):
+        cursor = self.cursor
+        last = cursor.last
+        cursor.skip = skip
+        cursor.limit = result.get('limit') or cursor.limit
+        cursor.position = 0
+        for item in items:
+            identity = get_identity(item, self.key)
+            cursor.position += 1
+            cursor.last = identity
+            if cursor.position < drop:
+                continue
+            if cursor.position == drop:
+                if last is not None and identity != last:
+                    log.warning(
+                        'Search results changed since cursor was saved: '
+                        'item #%s is %r, expected %r.',
+                        skip + drop - 1, identity, last
+                    )
+                continue
+            yield item
+        # streamed pages tell the page size after the items
+        cursor.limit = result.get('limit') or cursor.limit
+        if cursor.position < drop:
+            log.warning(
+                'Search results changed since cursor was saved: '
+                'page at skip %s has %s of %s items.',
+                skip, cursor.position, drop
+            )
+
+
 class SearchAPI(BaseAPI):
     @check_token
     def search(
@@ -191,40 +352,252 @@ class SearchAPI(BaseAPI):
         """
         raise NotImplementedError()
 
-    def search_iterator(self, start_skip=0, max_failed=5, **kw):
+    def search_iterator(
+        self, start_skip=0, max_failed=5, concurrency=1, stream=False,
+        cursor=None, key=None, **kw
+    ):
         r"""
         Iterator for :func:`search`.
 
+        With ``concurrency`` greater than ``1`` the next pages are requested
+        in background threads while the current one is consumed. Items are
+        yielded in the same order as without prefetching.
+
+        With ``stream`` the items of every page are decoded one by one while
+        the page is read from the socket (see
+        :class:`recommendpy.stream.RecommendResultStream`). A page is
+        retried only if it fails before its first item.
+
+        The position of iterator is kept in its ``cursor``
+        (:class:`recommendpy.cursor.SearchCursor`), pass a saved cursor to
+        continue after the last yielded item.
+
         :param start_skip: Start ``skip`` parameter to search.
             Defaults to ``0``.
         :param max_failed: Max attempts count for one search request.
             Defaults to ``5``.
+        :param concurrency: Max count of pages requested at the same time.
+            Defaults to ``1`` (no prefetching).
+        :param stream: decode pages while they are read.
+            Defaults to ``False``.
+        :param cursor: :class:`recommendpy.cursor.SearchCursor`, its dict or
+            json string to resume from, ``start_skip`` and ``kw`` are
+            ignored. Defaults to ``None``.
+        :param key: name of item field with identity, or function returning
+            identity of item, kept in cursor to check resumed pages.
+            Defaults to ``None`` (see
+            :func:`recommendpy.cursor.get_identity`).
         :param \**kw: additional keyword arguments are passed to
             :func:`search`.
 
         :raises: :class:`recommendpy.exceptions.RecommendAPIError`
             if ``max_failed`` reached.
 
-        :return: generator for search results.
+        :return: :class:`SearchIterator` object.
         :yields: search result
         """
-        skip = start_skip
+        if self._client.is_async:
+            raise RecommendAPIError(
+                'Use async_search_iterator with AsyncRecommendAPI.'
+            )
+        if cursor is None:
+            cursor = SearchCursor(skip=start_skip, filters=kw)
+        elif isinstance(cursor, str):
+            cursor = SearchCursor.loads(cursor)
+        elif isinstance(cursor, dict):
+            cursor = SearchCursor.from_dict(cursor)
+        return SearchIterator(
+            self, cursor, max_failed=max_failed, concurrency=concurrency,
+            stream=stream, key=key
+        )
+
+    def export(
+        self, path, format=None, compression=None, concurrency=4,
+        stream=True, fieldnames=None, callback=None, **kw
+    ):
+        r"""
+        Write all results of :func:`search` to file.
+
+        Pages are prefetched with ``concurrency`` and decoded while they are
+        read, results are written one by one, so memory use does not depend
+        on the count of results.
+
+        Usage::
+
+            report = api.messaging.channel_email.export(
+                'emails.csv.gz', subscription_statuses=['subscribed']
+            )
+
+        :param path: path of file (required).
+        :param format: format of file. One of ['jsonl', 'csv', 'parquet'].
+            Defaults to ``None`` (by extension of ``path``).
+        :param compression: compression of file. One of [None, 'gzip',
+            'bz2', 'xz'], for Parquet a parquet codec.
+            Defaults to ``None`` (by extension of ``path``).
+        :param concurrency: Max count of pages requested at the same time.
+            Defaults to ``4``.
+        :param stream: decode pages while they are read.
+            Defaults to ``True``.
+        :param fieldnames: list of CSV columns. Defaults to ``None``
+            (keys of the first result).
+        :param callback: function called with
+            :class:`recommendpy.export.ExportReport` on progress.
+            Defaults to ``None``.
+        :param \**kw: additional keyword arguments are passed to
+            :func:`search_iterator`.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: :class:`recommendpy.export.ExportReport` object with count
+            of rows, bytes written and throughput.
+        """
+        # compression modules are needed by exports only, keep import cheap
+        from ..export import export
+
+        iterator = self.search_iterator(
+            concurrency=concurrency, stream=stream, **kw
+        )
+        try:
+            return export(
+                iterator, path, format=format, compression=compression,
+                fieldnames=fieldnames, dumps=self._client.serializer.dumps,
+                callback=callback
+            )
+        finally:
+            iterator.close()
+
+    def _search_page(self, skip, limit, max_failed, kw):
         failed_count = 0
-        limit = 3000
         while True:
             try:
                 result = self.search(skip=skip, limit=limit, **kw)
-
-                failed_count = 0
-                if not isinstance(result, dict):
+                if not isinstance(result, (dict, RecommendResultStream)):
                     raise RecommendAPIError('Empty result.')
+                return result
+            except RecommendAPIError as e:
+                failed_count += 1
+                if failed_count > max_failed:
+                    raise e
+
+    @staticmethod
+    def _is_last_page(result, limit):
+        if isinstance(result, RecommendResultStream):
+            count = result.count
+        else:
+            count = len(result.get('data', []))
+        return (
+            not count or not limit or count < limit or
+            result.get('total', 0) < limit
+        )
+
+    def _iter_pages(self, skip, limit, max_failed, kw):
+        while True:
+            result = self._search_page(skip, limit, max_failed, kw)
+            yield skip, result
+            limit = result.get('limit', 0)
+            if self._is_last_page(result, limit):
+                break
+            skip += limit
+
+    def _prefetch_pages(self, skip, limit, max_failed, concurrency, kw):
+        result = self._search_page(skip, limit, max_failed, kw)
+        yield skip, result
+        # the first response tells the real page size and the total count
+        limit = result.get('limit', 0)
+        if self._is_last_page(result, limit):
+            return
+        total = result.get('total', 0)
+        end = total if total > limit else None
+        next_skip = skip + limit
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                while True:
+                    while len(pending) < concurrency and (
+                        end is None or next_skip < end
+                    ):
+                        pending.append((next_skip, executor.submit(
+                            self._search_page,
+                            next_skip, limit, max_failed, kw
+                        )))
+                        next_skip += limit
+                    if not pending:
+                        break
+                    skip, future = pending.popleft()
+                    result = future.result()
+                    yield skip, result
+                    if self._is_last_page(result, limit):
+                        break
+            finally:
+                for _, future in pending:
+                    future.cancel()
+                for _, future in pending:
+                    _close_page(future)
+
+    async def async_search_iterator(
+        self, start_skip=0, max_failed=5, concurrency=1, **kw
+    ):
+        r"""
+        Asynchronous iterator for :func:`search`.
+
+        Works with :class:`recommendpy.AsyncRecommendAPI` only, use it with
+        ``async for``.
+
+        :param start_skip: Start ``skip`` parameter to search.
+            Defaults to ``0``.
+        :param max_failed: Max attempts count for one search request.
+            Defaults to ``5``.
+        :param concurrency: Max count of pages requested at the same time.
+            Defaults to ``1`` (no prefetching).
+        :param \**kw: additional keyword arguments are passed to
+            :func:`search`.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if ``max_failed`` reached.
+
+        :return: asynchronous generator for search results.
+        :yields: search result
+        """
+        import asyncio  # only async clients need it, keep import cheap
 
+        skip = start_skip
+        limit = SEARCH_PAGE_LIMIT
+        result = await self._async_search_page(skip, limit, max_failed, kw)
+        pending = deque()
+        try:
+            while True:
                 for item in result.get('data', []):
                     yield item
                 limit = result.get('limit', 0)
-                if result.get('total', 0) < limit:
+                if self._is_last_page(result, limit):
                     break
-                skip += limit
+                total = result.get('total', 0)
+                end = total if total > limit else None
+                while len(pending) < concurrency and (
+                    end is None or skip + limit < end
+                ):
+                    skip += limit
+                    pending.append(asyncio.ensure_future(
+                        self._async_search_page(skip, limit, max_failed, kw)
+                    ))
+                if not pending:
+                    break
+                result = await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _async_search_page(self, skip, limit, max_failed, kw):
+        failed_count = 0
+        while True:
+            try:
+                result = await self.search(skip=skip, limit=limit, **kw)
+                if not isinstance(result, dict):
+                    raise RecommendAPIError('Empty result.')
+                return result
             except RecommendAPIError as e:
                 failed_count += 1
                 if failed_count > max_failed:
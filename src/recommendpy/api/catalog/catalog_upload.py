@@ -1,8 +1,24 @@
+import time
+
 from ..base import BaseAPI, check_token
-from ...exceptions import RecommendAPIError
+from ...batch import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MIN_CHUNK_SIZE,
+    PROGRESS_INTERVAL,
+    ThroughputMixin,
+    iter_chunks,
+    run_batches,
+)
+from ...exceptions import RecommendAPIError, RecommendUploadError
+
+import logging
+log = logging.getLogger('recommendpy')
 
 __all__ = [
     'CatalogUploadAPI',
+    'CatalogUploadSession',
 ]
 
 
@@ -38,7 +54,7 @@ class CatalogUploadAPI(BaseAPI):
         :return: result of response.json().
         """
         return self._client.send(
-            'post', self.get_path(method='list_batch'), **kw
+            'post', self.get_path(method='list_batch'), data, **kw
         )
 
     @check_token
@@ -54,7 +70,7 @@ class CatalogUploadAPI(BaseAPI):
         :return: result of response.json().
         """
         return self._client.send(
-            'post', self.get_path(method='product_batch'), **kw
+            'post', self.get_path(method='product_batch'), data, **kw
         )
 
     @check_token
@@ -70,7 +86,7 @@ class CatalogUploadAPI(BaseAPI):
         :return: result of response.json().
         """
         return self._client.send(
-            'post', self.get_path(method='variation_batch'), **kw
+            'post', self.get_path(method='variation_batch'), data, **kw
         )
 
     @check_token
@@ -106,6 +122,60 @@ class CatalogUploadAPI(BaseAPI):
             'post', self.get_path(), data, **kw
         )
 
+    def session(self, mode, level_mode, level_store_code=None, **kw):
+        r"""
+        Create managed catalog upload session.
+
+        :param mode: mode (required).
+            One of ['block', 'append', 'append_by_timestamp'].
+        :param level_mode: level mode (required). One of ['account', 'store'].
+        :param level_store_code: level store code
+            (used for level_mode == 'store'). Defaults to ``None``.
+        :param \**kw: additional keyword arguments are passed to
+            :class:`CatalogUploadSession`.
+
+        :return: :class:`CatalogUploadSession` object.
+        """
+        return CatalogUploadSession(
+            self, mode, level_mode, level_store_code, **kw
+        )
+
+    def upload(
+        self, mode, level_mode, level_store_code=None, products=None,
+        variations=None, lists=None, **kw
+    ):
+        r"""
+        Upload whole catalog.
+
+        Initializes upload, sends ``products``, ``variations`` and ``lists``
+        in concurrent batches and commits the upload. The upload is rolled
+        back if any batch fails.
+
+        :param mode: mode (required).
+            One of ['block', 'append', 'append_by_timestamp'].
+        :param level_mode: level mode (required). One of ['account', 'store'].
+        :param level_store_code: level store code
+            (used for level_mode == 'store'). Defaults to ``None``.
+        :param products: iterable of products. Defaults to ``None``.
+        :param variations: iterable of variations. Defaults to ``None``.
+        :param lists: iterable of lists. Defaults to ``None``.
+        :param \**kw: additional keyword arguments are passed to
+            :class:`CatalogUploadSession`.
+
+        :raises: :class:`recommendpy.exceptions.RecommendUploadError`
+            if any batch failed.
+
+        :return: committed :class:`CatalogUploadSession` object.
+        """
+        with self.session(mode, level_mode, level_store_code, **kw) as session:
+            if products is not None:
+                session.upload_products(products)
+            if variations is not None:
+                session.upload_variations(variations)
+            if lists is not None:
+                session.upload_lists(lists)
+        return session
+
     @check_token
     def list_batch(self, identifier, data, **kw):
         r"""
@@ -123,7 +193,7 @@ class CatalogUploadAPI(BaseAPI):
             raise RecommendAPIError('Incorrect identifier.')
         return self._client.send(
             'post', self.get_path(identifier=identifier, method='list_batch'),
-            **kw
+            data, **kw
         )
 
     @check_token
@@ -145,7 +215,7 @@ class CatalogUploadAPI(BaseAPI):
             'post', self.get_path(
                 identifier=identifier, method='product_batch'
             ),
-            **kw
+            data, **kw
         )
 
     @check_token
@@ -167,7 +237,7 @@ class CatalogUploadAPI(BaseAPI):
             'post', self.get_path(
                 identifier=identifier, method='variation_batch'
             ),
-            **kw
+            data, **kw
         )
 
     @check_token
@@ -203,7 +273,235 @@ class CatalogUploadAPI(BaseAPI):
         """
         return self._client.send(
             'post', self.get_path(
-                identifier=identifier, method='commit'
+                identifier=identifier, method='rollback'
             ),
             **kw
         )
+
+
+class CatalogUploadSession(ThroughputMixin):
+    r"""
+    Managed catalog upload.
+
+    Usage::
+
+        with api.catalog_upload.session('block', 'account') as session:
+            session.upload_products(read_products())
+            session.upload_variations(read_variations())
+
+    The upload is committed when the ``with`` block succeeds and rolled
+    back when any batch fails or an exception is raised.
+    """
+
+    def __init__(
+        self, api, mode, level_mode, level_store_code=None,
+        chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=DEFAULT_CHUNK_BYTES,
+        concurrency=DEFAULT_CONCURRENCY, callback=None,
+        progress_interval=PROGRESS_INTERVAL, key=None, bisect=True,
+        min_size=DEFAULT_MIN_CHUNK_SIZE, **kw
+    ):
+        r"""
+        Initialize CatalogUploadSession object.
+
+        :param api: :class:`CatalogUploadAPI` object (required).
+        :param mode: mode (required).
+            One of ['block', 'append', 'append_by_timestamp'].
+        :param level_mode: level mode (required). One of ['account', 'store'].
+        :param level_store_code: level store code
+            (used for level_mode == 'store'). Defaults to ``None``.
+        :param chunk_size: max count of records in one batch.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one batch in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of batches sent at the same time.
+            Defaults to ``4``.
+        :param callback: function called with session after every finished
+            batch. Defaults to ``None``.
+        :param progress_interval: interval in seconds of throughput logging.
+            Defaults to ``10``.
+        :param key: name of record field with identifier used to map item
+            errors of batches to records. Defaults to ``None`` (by index).
+        :param bisect: split batches failed with ``413``, a gateway timeout
+            or a read timeout in halves and send them again, the largest
+            accepted size is used for the following batches.
+            Defaults to ``True``.
+        :param min_size: min count of records in split batch.
+            Defaults to ``10``.
+        :param \**kw: additional keyword arguments are passed to requests.
+        """
+        self.api = api
+        self.mode = mode
+        self.level_mode = level_mode
+        self.level_store_code = level_store_code
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.callback = callback
+        self.progress_interval = progress_interval
+        self.key = key
+        self.bisect = bisect
+        self.min_size = min_size
+        self.kw = kw
+
+        self.identifier = None
+        self.reports = {}
+        self.started_at = None
+        self.finished_at = None
+        self._logged_at = 0
+
+    def start(self):
+        r"""
+        Initialize catalog upload.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+        """
+        self.api.check_sync_client()
+        result = self.api(
+            self.mode, self.level_mode, self.level_store_code, **self.kw
+        )
+        if isinstance(result, dict):
+            result = result.get('upload_id') or result.get('id')
+        if not result or result is True:
+            raise RecommendAPIError('Unable to get upload identifier.')
+        self.identifier = result
+        self.started_at = time.monotonic()
+        self._logged_at = self.started_at
+        log.info('Catalog upload %s started.', self.identifier)
+
+    def upload_products(self, records):
+        r"""
+        Upload products.
+
+        :param records: iterable of products (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendUploadError`
+            if any batch failed.
+
+        :return: :class:`recommendpy.batch.BatchReport` object.
+        """
+        return self._upload('product', self.api.product_batch, records)
+
+    def upload_variations(self, records):
+        r"""
+        Upload variations.
+
+        :param records: iterable of variations (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendUploadError`
+            if any batch failed.
+
+        :return: :class:`recommendpy.batch.BatchReport` object.
+        """
+        return self._upload('variation', self.api.variation_batch, records)
+
+    def upload_lists(self, records):
+        r"""
+        Upload lists.
+
+        :param records: iterable of lists (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendUploadError`
+            if any batch failed.
+
+        :return: :class:`recommendpy.batch.BatchReport` object.
+        """
+        return self._upload('list', self.api.list_batch, records)
+
+    def commit(self):
+        r"""
+        Commit catalog upload.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+        """
+        self.api.commit(self.identifier, **self.kw)
+        self.finished_at = time.monotonic()
+        log.info('Catalog upload %s committed. %s', self.identifier, self)
+
+    def rollback(self):
+        r"""
+        Rollback catalog upload.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+        """
+        self.api.rollback(self.identifier, **self.kw)
+        self.finished_at = time.monotonic()
+        log.warning('Catalog upload %s rolled back.', self.identifier)
+
+    @property
+    def records(self):
+        return sum(report.records for report in self.reports.values())
+
+    @property
+    def bytes(self):
+        return sum(report.bytes for report in self.reports.values())
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+            return
+        try:
+            self.rollback()
+        except RecommendAPIError as e:
+            log.exception(e)
+
+    def __str__(self):
+        return (
+            '{} records, {} bytes in {:.1f}s '
+            '({:.1f} records/s, {:.1f} bytes/s)'
+        ).format(
+            self.records, self.bytes, self.elapsed,
+            self.records_per_second, self.bytes_per_second
+        )
+
+    def _upload(self, entity, send, records):
+        if self.identifier is None:
+            raise RecommendAPIError('Catalog upload is not started.')
+        report = run_batches(
+            lambda chunk: send(self.identifier, chunk, **self.kw),
+            iter_chunks(
+                records, self.chunk_size, self.max_bytes,
+                self.api._client.serializer.dumps
+            ),
+            self.concurrency,
+            callback=lambda report: self._progress(entity, report),
+            stop_on_error=True,
+            key=self.key,
+            limit=self._get_limit(entity),
+            min_size=self.min_size
+        )
+        self.reports[entity] = report
+        if not report.ok:
+            raise RecommendUploadError(
+                'Catalog upload {}: {} of {} {} batches failed.'.format(
+                    self.identifier, report.failed_chunks,
+                    len(report.chunks), entity
+                ),
+                reports=self.reports
+            )
+        return report
+
+    def _get_limit(self, entity):
+        if not self.bisect:
+            return None
+        return self.api._client.batch_limit(
+            self.api.get_path(method='{}_batch'.format(entity))
+        )
+
+    def _progress(self, entity, report):
+        self.reports[entity] = report
+        now = time.monotonic()
+        if now - self._logged_at >= self.progress_interval:
+            self._logged_at = now
+            log.info('Catalog upload %s: %s', self.identifier, self)
+        if self.callback:
+            self.callback(self)
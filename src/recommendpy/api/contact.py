@@ -1,7 +1,21 @@
+import time
+
 from .base import BaseAPI, CRUDAPI, SearchAPI, check_token
 
+from ..batch import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONCURRENCY,
+    SyncReport,
+    iter_chunks,
+    iter_field_chunks,
+    run_batches,
+)
 from ..exceptions import RecommendAPIError
 
+import logging
+log = logging.getLogger('recommendpy')
+
 
 __all__ = [
     'ContactAPI',
@@ -68,7 +82,7 @@ class ContactBatchAPI(BaseAPI):
         :return: result of response.json().
         """
         return self._client.send(
-            'post', self.get_path(method='customer_id'), data
+            'post', self.get_path(method='customer_id'), data, **kw
         )
 
     @check_token
@@ -84,7 +98,52 @@ class ContactBatchAPI(BaseAPI):
         :return: result of response.json().
         """
         return self._client.send(
-            'post', self.get_path(method='email'), data
+            'post', self.get_path(method='email'), data, **kw
+        )
+
+    def bulk(
+        self, field, records, chunk_size=DEFAULT_CHUNK_SIZE,
+        max_bytes=DEFAULT_CHUNK_BYTES, concurrency=DEFAULT_CONCURRENCY, **kw
+    ):
+        r"""
+        Create contacts from iterable of any size.
+
+        Splits ``records`` into chunks bounded by count of records and
+        serialized size and uploads them concurrently with
+        :func:`customer_id` or :func:`email`. ``records`` may be
+        a generator, only the chunks being uploaded are kept in memory.
+
+        :param field: name of field to match contacts by (required).
+            One of ['customer_id', 'email']
+        :param records: iterable of contacts (required).
+        :param chunk_size: max count of contacts in one request.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one request body in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of requests sent at the same time.
+            Defaults to ``4``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if incorrect field.
+
+        :return: :class:`recommendpy.batch.BatchReport` with result,
+            timing and error of every chunk, item errors are mapped to
+            contacts by ``field``.
+        """
+        self.check_sync_client()
+        if field not in ['customer_id', 'email']:
+            raise RecommendAPIError(
+                'Please send valid `field`'
+            )
+        send = getattr(self, field)
+        return run_batches(
+            lambda chunk: send(chunk, **kw),
+            iter_chunks(
+                records, chunk_size, max_bytes, self._client.serializer.dumps
+            ),
+            concurrency,
+            key=field
         )
 
 
@@ -166,7 +225,7 @@ class ContactSegmentAPI(CRUDAPI, SearchAPI):
         }
         return self._client.send(
             'post', self.get_path(identifier=identifier, method='attach'),
-            data=data
+            data=data, **kw
         )
 
     @check_token
@@ -194,8 +253,65 @@ class ContactSegmentAPI(CRUDAPI, SearchAPI):
         }
         return self._client.send(
             'post', self.get_path(identifier=identifier, method='detach'),
-            data=data
+            data=data, **kw
+        )
+
+    def sync(
+        self, identifier, field, identifiers, chunk_size=DEFAULT_CHUNK_SIZE,
+        max_bytes=DEFAULT_CHUNK_BYTES, concurrency=DEFAULT_CONCURRENCY, **kw
+    ):
+        r"""
+        Make members of contact segment equal to identifiers.
+
+        Reads current members with :func:`search_iterator` (pages are
+        requested concurrently), computes the difference locally and sends
+        only the identifiers to attach and to detach, in chunks sent
+        concurrently.
+
+        :param identifier: identifier of contact segment (required).
+        :param field: name of field to match by identifiers (required).
+            One of ['customer_id', 'email']
+        :param identifiers: iterable of desired identifiers (required).
+        :param chunk_size: max count of identifiers in one request.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one request body in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of requests sent at the same time.
+            Defaults to ``4``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if incorrect field or members can not be read.
+
+        :return: :class:`recommendpy.batch.SyncReport` object.
+        """
+        self.check_sync_client()
+        if field not in ['customer_id', 'email']:
+            raise RecommendAPIError(
+                'Please send valid `field`'
+            )
+        started = time.monotonic()
+        desired = set(identifiers)
+        current = set(self.search_iterator(
+            identifier=identifier, field=field, concurrency=concurrency
+        ))
+        dumps = self._client.serializer.dumps
+        report = SyncReport(
+            len(current), len(desired),
+            attached=run_batches(
+                lambda chunk: self.attach(identifier, field, chunk, **kw),
+                iter_chunks(desired - current, chunk_size, max_bytes, dumps),
+                concurrency
+            ),
+            detached=run_batches(
+                lambda chunk: self.detach(identifier, field, chunk, **kw),
+                iter_chunks(current - desired, chunk_size, max_bytes, dumps),
+                concurrency
+            )
         )
+        report.elapsed = time.monotonic() - started
+        log.info('Contact segment %s synced: %r.', identifier, report)
+        return report
 
 
 class ContactListAPI(CRUDAPI):
@@ -236,7 +352,7 @@ class ContactListAPI(CRUDAPI):
             data['push_tokens'] = push_tokens
         return self._client.send(
             'post', self.get_path(identifier=identifier, method='attach'),
-            data=data
+            data=data, **kw
         )
 
     @check_token
@@ -270,7 +386,92 @@ class ContactListAPI(CRUDAPI):
             data['push_tokens'] = push_tokens
         return self._client.send(
             'post', self.get_path(identifier=identifier, method='detach'),
-            data=data
+            data=data, **kw
+        )
+
+    def bulk_attach(
+        self, identifier, customer_ids=None, emails=None, push_tokens=None,
+        chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=DEFAULT_CHUNK_BYTES,
+        concurrency=DEFAULT_CONCURRENCY, **kw
+    ):
+        r"""
+        Attach any count of contacts to contact list.
+
+        Every type of identifiers is split into chunks bounded by count and
+        serialized size, chunks are attached concurrently with
+        :func:`attach`. Call ``retry()`` of the result to attach the failed
+        chunks again.
+
+        :param identifier: identifier of contact list (required).
+        :param customer_ids: iterable of customer_ids. Defaults to ``None``.
+        :param emails: iterable of emails. Defaults to ``None``.
+        :param push_tokens: iterable of push_tokens. Defaults to ``None``.
+        :param chunk_size: max count of identifiers in one request.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one request body in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of requests sent at the same time.
+            Defaults to ``4``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :return: :class:`recommendpy.batch.BatchReport` with result,
+            timing and error of every chunk.
+        """
+        return self._bulk(
+            self.attach, identifier, customer_ids, emails, push_tokens,
+            chunk_size, max_bytes, concurrency, kw
+        )
+
+    def bulk_detach(
+        self, identifier, customer_ids=None, emails=None, push_tokens=None,
+        chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=DEFAULT_CHUNK_BYTES,
+        concurrency=DEFAULT_CONCURRENCY, **kw
+    ):
+        r"""
+        Detach any count of contacts from contact list.
+
+        See :func:`bulk_attach`.
+
+        :param identifier: identifier of contact list (required).
+        :param customer_ids: iterable of customer_ids. Defaults to ``None``.
+        :param emails: iterable of emails. Defaults to ``None``.
+        :param push_tokens: iterable of push_tokens. Defaults to ``None``.
+        :param chunk_size: max count of identifiers in one request.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one request body in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of requests sent at the same time.
+            Defaults to ``4``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :return: :class:`recommendpy.batch.BatchReport` with result,
+            timing and error of every chunk.
+        """
+        return self._bulk(
+            self.detach, identifier, customer_ids, emails, push_tokens,
+            chunk_size, max_bytes, concurrency, kw
+        )
+
+    def _bulk(
+        self, send, identifier, customer_ids, emails, push_tokens,
+        chunk_size, max_bytes, concurrency, kw
+    ):
+        self.check_sync_client()
+        if not emails and not customer_ids and not push_tokens:
+            raise RecommendAPIError(
+                'Please send emails, customer_ids or push_tokens'
+            )
+        fields = {
+            'customer_ids': customer_ids,
+            'emails': emails,
+            'push_tokens': push_tokens,
+        }
+        return run_batches(
+            lambda chunk, field: send(identifier, **{field: chunk}, **kw),
+            iter_field_chunks(
+                fields, chunk_size, max_bytes, self._client.serializer.dumps
+            ),
+            concurrency
         )
 
     @check_token
@@ -286,5 +487,6 @@ class ContactListAPI(CRUDAPI):
         :return: result of response.json().
         """
         return self._client.send(
-            'post', self.get_path(identifier=identifier, method='detach')
+            'post', self.get_path(identifier=identifier, method='detach'),
+            **kw
         )
@@ -23,9 +23,7 @@ class ConfigAPI(BaseAPI):
 
         :return: result of response.json().
         """
-        return self._client.send(
-            'get', self.get_path(), **kw
-        )
+        return self._client.send_cached(self.get_path(), **kw)
 
     @check_token
     def update(
@@ -49,9 +47,7 @@ class ConfigAPI(BaseAPI):
             'default_currency': default_currency,
             'default_price_list': default_price_list,
         }
-        return self._client.send(
-            'put', self.get_path(), data, **kw
-        )
+        return self.send_invalidating('put', self.get_path(), data, **kw)
 
 
 class StoreAPI(CRUDAPI):
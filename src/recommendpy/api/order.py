@@ -1,4 +1,12 @@
 from .base import CRUDAPI, check_token
+from ..batch import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MIN_CHUNK_SIZE,
+    iter_chunks,
+    run_batches,
+)
 
 __all__ = [
     'OrderAPI',
@@ -25,5 +33,129 @@ class OrderAPI(CRUDAPI):
         """
         return self._client.send(
             'post', self.get_path(method='batch'),
-            data=data
+            data=data, **kw
         )
+
+    def bulk(
+        self, records, chunk_size=DEFAULT_CHUNK_SIZE,
+        max_bytes=DEFAULT_CHUNK_BYTES, concurrency=DEFAULT_CONCURRENCY,
+        key=None, bisect=True, min_size=DEFAULT_MIN_CHUNK_SIZE, **kw
+    ):
+        r"""
+        Create orders from iterable of any size.
+
+        Splits ``records`` into chunks bounded by count of records and
+        serialized size and uploads them concurrently with :func:`batch`.
+        With ``bisect`` a chunk failed with ``413``, a gateway timeout or
+        a read timeout is split in halves and sent again, the largest
+        accepted count of orders is used for the following chunks (see
+        :func:`recommendpy.RecommendAPI.batch_limit`).
+        ``records`` may be a generator or a feed
+        (:class:`recommendpy.feed.JSONLFeed`), only the chunks being
+        uploaded are kept in memory.
+
+        :param records: iterable of orders (required).
+        :param chunk_size: max count of orders in one request.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one request body in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of requests sent at the same time.
+            Defaults to ``4``.
+        :param key: name of order field with identifier used to map item
+            errors to orders, they are mapped by index only if not set.
+            Defaults to ``None``.
+        :param bisect: split chunks rejected as too large.
+            Defaults to ``True``.
+        :param min_size: min count of orders in split chunk.
+            Defaults to ``10``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :return: :class:`recommendpy.batch.BatchReport` with result,
+            timing and error of every chunk.
+        """
+        self.check_sync_client()
+        return run_batches(
+            lambda chunk: self.batch(chunk, **kw),
+            iter_chunks(
+                records, chunk_size, max_bytes, self._client.serializer.dumps
+            ),
+            concurrency,
+            key=key,
+            limit=(
+                self._client.batch_limit(self.get_path(method='batch'))
+                if bisect else None
+            ),
+            min_size=min_size
+        )
+
+    def backfill(
+        self, records, checkpoint, chunk_size=DEFAULT_CHUNK_SIZE,
+        max_bytes=DEFAULT_CHUNK_BYTES, concurrency=DEFAULT_CONCURRENCY,
+        key=None, bisect=True, min_size=DEFAULT_MIN_CHUNK_SIZE, retries=2,
+        callback=None, **kw
+    ):
+        r"""
+        Create orders from iterable of any size with resumable progress.
+
+        Works like :func:`bulk`, every accepted chunk is committed to
+        ``checkpoint``. Running the backfill again with the same records
+        and checkpoint sends only the orders which are not committed yet,
+        e.g. after a crash.
+
+        Usage::
+
+            api.order.backfill(JSONLFeed('orders.jsonl'), 'orders.sqlite')
+
+        :param records: iterable of orders, read in the same order on every
+            run (required).
+        :param checkpoint: :class:`recommendpy.backfill.SQLiteCheckpoint`
+            object or path of its database (required).
+        :param chunk_size: max count of orders in one request.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one request body in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of requests sent at the same time.
+            Defaults to ``4``.
+        :param key: name of order field with identifier used to map item
+            errors without index to orders, a chunk with such transient
+            errors is not committed nor sent again. Defaults to ``None``.
+        :param bisect: split chunks rejected as too large.
+            Defaults to ``True``.
+        :param min_size: min count of orders in split chunk.
+            Defaults to ``10``.
+        :param retries: count of times failed chunks are sent again.
+            Defaults to ``2``.
+        :param callback: function called with
+            :class:`recommendpy.backfill.Backfill` after every finished
+            chunk. Defaults to ``None``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :return: finished :class:`recommendpy.backfill.Backfill` object,
+            its ``report`` is :class:`recommendpy.batch.BatchReport`.
+        """
+        self.check_sync_client()
+        # sqlite3 is needed by backfills only, keep import cheap
+        from ..backfill import Backfill, SQLiteCheckpoint
+
+        if not isinstance(checkpoint, SQLiteCheckpoint):
+            checkpoint = SQLiteCheckpoint(
+                checkpoint, name=self.get_path(method='batch')
+            )
+        backfill = Backfill(
+            lambda chunk: self.batch(chunk, **kw),
+            checkpoint,
+            chunk_size=chunk_size,
+            max_bytes=max_bytes,
+            concurrency=concurrency,
+            dumps=self._client.serializer.dumps,
+            key=key,
+            limit=(
+                self._client.batch_limit(self.get_path(method='batch'))
+                if bisect else None
+            ),
+            min_size=min_size,
+            retries=retries,
+            callback=callback
+        )
+        backfill.run(records)
+        return backfill
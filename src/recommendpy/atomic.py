@@ -0,0 +1,33 @@
+import os
+
+__all__ = [
+    'write_atomic',
+]
+
+
+def write_atomic(path, text, prefix='.tmp-'):
+    r"""
+    Write text to file atomically.
+
+    The text is written to a temporary file of the same directory, synced
+    and moved over ``path`` with ``os.replace``, so readers see either
+    the old or the new file, never a partial one.
+
+    :param path: path of file (required).
+    :param text: content of file (required).
+    :param prefix: prefix of name of temporary file.
+        Defaults to ``'.tmp-'``.
+    """
+    import tempfile  # only writers need it, keep import cheap
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=prefix, dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
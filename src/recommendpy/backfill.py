@@ -0,0 +1,312 @@
+import json
+import sqlite3
+import threading
+import time
+
+from .batch import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MIN_CHUNK_SIZE,
+    PROGRESS_INTERVAL,
+    iter_chunks,
+    run_batches,
+)
+
+import logging
+log = logging.getLogger('recommendpy')
+
+__all__ = [
+    'Backfill',
+    'SQLiteCheckpoint',
+]
+
+
+class SQLiteCheckpoint(object):
+    r"""
+    Committed offsets of a backfill stored in SQLite.
+
+    Offsets are positions of records in the source. Committed ranges are
+    merged when they meet, so the table keeps a few rows: the committed
+    prefix and the chunks finished ahead of slower ones.
+
+    Usage::
+
+        checkpoint = SQLiteCheckpoint('backfill.sqlite', name='orders-2019')
+    """
+
+    def __init__(self, path, name='default'):
+        r"""
+        Initialize SQLiteCheckpoint object.
+
+        :param path: path of SQLite database file (required).
+        :param name: name of backfill, one database can keep checkpoints of
+            several backfills. Defaults to ``'default'``.
+        """
+        self.path = path
+        self.name = name
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS backfill_range ('
+                'name TEXT NOT NULL, start INTEGER NOT NULL, '
+                'stop INTEGER NOT NULL, PRIMARY KEY (name, start))'
+            )
+        self._ranges = [
+            list(row) for row in self._db.execute(
+                'SELECT start, stop FROM backfill_range WHERE name = ? '
+                'ORDER BY start', (name,)
+            )
+        ]
+
+    @property
+    def ranges(self):
+        r"""List of committed ranges as tuples of start and stop offsets."""
+        with self._lock:
+            return [tuple(item) for item in self._ranges]
+
+    @property
+    def offset(self):
+        r"""Count of records committed without gaps from the start."""
+        with self._lock:
+            if self._ranges and self._ranges[0][0] == 0:
+                return self._ranges[0][1]
+            return 0
+
+    @property
+    def committed(self):
+        r"""Count of committed records."""
+        with self._lock:
+            return sum(stop - start for start, stop in self._ranges)
+
+    def commit(self, start, stop):
+        r"""
+        Save range of records accepted by the api.
+
+        :param start: offset of the first record (required).
+        :param stop: offset after the last record (required).
+        """
+        with self._lock:
+            ranges = self._ranges
+            index = 0
+            while index < len(ranges) and ranges[index][1] < start:
+                index += 1
+            removed = []
+            merged = [start, stop]
+            while index < len(ranges) and ranges[index][0] <= stop:
+                item = ranges.pop(index)
+                removed.append(item[0])
+                merged = [min(merged[0], item[0]), max(merged[1], item[1])]
+            ranges.insert(index, merged)
+            with self._db:
+                self._db.executemany(
+                    'DELETE FROM backfill_range WHERE name = ? AND start = ?',
+                    [(self.name, item) for item in removed]
+                )
+                self._db.execute(
+                    'INSERT INTO backfill_range (name, start, stop) '
+                    'VALUES (?, ?, ?)', (self.name, merged[0], merged[1])
+                )
+
+    def reset(self):
+        r"""Forget committed ranges, the next run starts from the start."""
+        with self._lock:
+            self._ranges = []
+            with self._db:
+                self._db.execute(
+                    'DELETE FROM backfill_range WHERE name = ?', (self.name,)
+                )
+
+    def close(self):
+        self._db.close()
+
+    def __repr__(self):
+        return '<SQLiteCheckpoint {} offset={} ranges={}>'.format(
+            self.name, self.offset, len(self._ranges)
+        )
+
+
+class Backfill(object):
+    r"""
+    Resumable upload of a stream of records in concurrent batches.
+
+    Every batch accepted by the api is committed to the checkpoint with its
+    offsets, a restarted backfill skips the committed records and sends
+    the rest. Records must be read in the same order on every run.
+
+    Only records accepted by the api are committed: the accepted parts of
+    a split batch and the items of a batch accepted with
+    ``batch_error_list`` except the items failed with transient errors,
+    which are sent again by the next run. Items failed with permanent
+    errors are committed and kept in the report. A batch whose transient
+    item errors are not matched to records (see ``key``) is not committed
+    and not retried, as its other items are accepted already.
+
+    Usage::
+
+        backfill = Backfill(
+            api.order.batch, SQLiteCheckpoint('orders.sqlite')
+        )
+        report = backfill.run(JSONLFeed('orders.jsonl'))
+    """
+
+    def __init__(
+        self, send, checkpoint, chunk_size=DEFAULT_CHUNK_SIZE,
+        max_bytes=DEFAULT_CHUNK_BYTES, concurrency=DEFAULT_CONCURRENCY,
+        dumps=json.dumps, key=None, limit=None,
+        min_size=DEFAULT_MIN_CHUNK_SIZE, retries=0, callback=None,
+        progress_interval=PROGRESS_INTERVAL
+    ):
+        r"""
+        Initialize Backfill object.
+
+        :param send: function which sends list of records (required).
+        :param checkpoint: :class:`SQLiteCheckpoint` object (required).
+        :param chunk_size: max count of records in one batch.
+            Defaults to ``1000``.
+        :param max_bytes: max size of one batch in bytes.
+            Defaults to ``4194304``.
+        :param concurrency: max count of batches sent at the same time.
+            Defaults to ``4``.
+        :param dumps: function used to serialize a record.
+            Defaults to ``json.dumps``.
+        :param key: name of record field with identifier used to map item
+            errors to records. Defaults to ``None`` (by index).
+        :param limit: :class:`recommendpy.batch.BatchSizeLimit` of endpoint
+            used to split batches rejected as too large.
+            Defaults to ``None``.
+        :param min_size: min count of records in split batch.
+            Defaults to ``10``.
+        :param retries: count of times failed batches are sent again at
+            the end of run, records accepted by the api and items failed
+            with permanent errors are not sent again. Defaults to ``0``.
+        :param callback: function called with backfill after every finished
+            batch. Defaults to ``None``.
+        :param progress_interval: interval in seconds of throughput logging.
+            Defaults to ``10``.
+        """
+        self.send = send
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self.dumps = dumps
+        self.key = key
+        self.limit = limit
+        self.min_size = min_size
+        self.retries = retries
+        self.callback = callback
+        self.progress_interval = progress_interval
+
+        self.report = None
+        self.skipped = 0
+        self._offsets = {}
+        self._committed = {}
+        self._seen = 0
+        self._logged_at = 0
+
+    def run(self, records):
+        r"""
+        Send records which are not committed yet.
+
+        :param records: iterable of records (required).
+
+        :return: :class:`recommendpy.batch.BatchReport` object.
+        """
+        self.skipped = 0
+        self._offsets = {}
+        self._committed = {}
+        self._seen = 0
+        self._logged_at = time.monotonic()
+        if self.checkpoint.offset:
+            log.info(
+                'Backfill %s: resuming from offset %s.',
+                self.checkpoint.name, self.checkpoint.offset
+            )
+        report = self.report = run_batches(
+            self.send, self._iter_chunks(records), self.concurrency,
+            callback=self._finished, key=self.key, limit=self.limit,
+            min_size=self.min_size
+        )
+        self._commit_new(report.chunks)
+        for _ in range(self.retries):
+            if not any(
+                chunk.pending_positions(skip_unmapped=True)
+                for chunk in report.failed
+            ):
+                break
+            # accepted records are committed, send only the rest
+            report.retry(items_only=True, skip_unmapped=True)
+            self._commit_new(report.chunks)
+        log.info('Backfill %s finished: %s', self.checkpoint.name, self)
+        return report
+
+    def __str__(self):
+        report = self.report
+        if report is None:
+            return 'not started'
+        return (
+            '{} records sent, {} skipped, {} failed, offset {} in {:.1f}s '
+            '({:.1f} records/s)'
+        ).format(
+            report.records, self.skipped, report.failed_records,
+            self.checkpoint.offset, report.elapsed,
+            report.records_per_second
+        )
+
+    def _iter_runs(self, records):
+        """Split records into runs of not committed records."""
+        ranges = self.checkpoint.ranges
+        position = 0
+        offset = 0
+        run = []
+        for record in records:
+            while position < len(ranges) and ranges[position][1] <= offset:
+                position += 1
+            if position < len(ranges) and ranges[position][0] <= offset:
+                self.skipped += 1
+                if run:
+                    yield offset - len(run), run
+                    run = []
+            else:
+                run.append(record)
+                if len(run) >= self.chunk_size:
+                    yield offset + 1 - len(run), run
+                    run = []
+            offset += 1
+        if run:
+            yield offset - len(run), run
+
+    def _iter_chunks(self, records):
+        index = 0
+        for start, run in self._iter_runs(records):
+            for chunk in iter_chunks(
+                run, self.chunk_size, self.max_bytes, self.dumps
+            ):
+                self._offsets[index] = start
+                start += len(chunk[0])
+                index += 1
+                yield chunk
+
+    def _commit_new(self, chunks):
+        for chunk in chunks:
+            offset = self._offsets[chunk.index]
+            committed = self._committed.setdefault(chunk.index, set())
+            for start, stop in chunk.accepted:
+                if (start, stop) not in committed:
+                    self.checkpoint.commit(offset + start, offset + stop)
+                    committed.add((start, stop))
+
+    def _finished(self, report):
+        self.report = report
+        self._commit_new(report.chunks[self._seen:])
+        self._seen = len(report.chunks)
+        now = time.monotonic()
+        if now - self._logged_at >= self.progress_interval:
+            self._logged_at = now
+            log.info('Backfill %s: %s', self.checkpoint.name, self)
+        if self.callback:
+            self.callback(self)
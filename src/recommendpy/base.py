@@ -1,6 +1,6 @@
-import requests
-
-import json
+import threading
+import time
+from functools import cached_property
 
 from .exceptions import (
     RecommendAPIError,
@@ -32,48 +32,210 @@ from .api import (
     PriceListAPI,
     CatalogUploadAPI,
 )
-
+from .api.attribute import ATTRIBUTE_TYPES, index_attributes
+from .batch import DEFAULT_CONCURRENCY
+from .serializer import get_serializer
 from .token import RecommendAPIToken
+from .trace import TRACE_BODY_SIZE
 
 import logging
 log = logging.getLogger('recommendpy')
 
+ATTRIBUTE_ENDPOINT = 'attribute/{entity_type}'
+ATTRIBUTE_STORE_MAPPING_ENDPOINT = (
+    'attribute/{entity_type}/{attribute_code}/store/{store_code}/mapping'
+)
+API_NAMESPACES = [
+    'authenticate', 'contact', 'messaging', 'order', 'config', 'store',
+    'webhook', 'currency', 'environment', 'price_list', 'catalog_upload',
+]
+COMPRESSIONS = [None, 'gzip', 'deflate']
+COMPRESSION_THRESHOLD = 1024
+COMPRESSION_LEVEL = 6
+# delay of background refresh after a failure and min delay between checks
+BACKGROUND_REFRESH_RETRY = 30
+BACKGROUND_REFRESH_MIN_DELAY = 1
+
 
 class RecommendAPI(object):
-    tokens = {}
-    is_auth_token_setted = False
+    r"""
+    Client of the Recommend API.
+
+    The client is thread-safe: tokens are owned by the instance and guarded
+    by a lock, and the auth header is passed with every request instead of
+    being stored in the shared session. One client per account can be
+    shared by a thread pool and reuses one connection pool, e.g.::
+
+        api = RecommendAPI(account_id, credential_file_path=path)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            executor.map(api.contact.get, identifiers)
+
+    Use ``requests.adapters.HTTPAdapter(pool_maxsize=...)`` on
+    ``api._session`` when more than 10 threads share the client.
+
+    Modules of optional features (retries, rate limits, cache, credential
+    file, compression, ...) are imported when they are used, the session
+    is created on the first request.
+    """
+
+    is_async = False
 
     def __init__(
         self, account_id, api_url='https://api.recommend.pro/v3',
         auth_token=None, get_token_func=None, set_token_func=None,
-        credential_file_path=None
+        credential_file_path=None, compression=None,
+        compression_threshold=COMPRESSION_THRESHOLD,
+        compression_level=COMPRESSION_LEVEL, serializer=None,
+        trace_func=None, trace_body_size=TRACE_BODY_SIZE, retry=None,
+        rate_limit=None, background_refresh=False, credential_store=None,
+        cache=None
     ):
+        r"""
+        Initialize RecommendAPI object.
+
+        :param account_id: identifier of account (required).
+        :param api_url: url of api.
+            Defaults to ``https://api.recommend.pro/v3``.
+        :param auth_token: :class:`recommendpy.token.RecommendAPIToken`
+            object. Defaults to ``None``.
+        :param get_token_func: function which returns token by token type.
+            Defaults to ``None``.
+        :param set_token_func: function which saves token by token type.
+            Defaults to ``None``.
+        :param credential_file_path: path of file to store tokens, see
+            :class:`recommendpy.credentials.FileCredentialStore`.
+            Defaults to ``None``.
+        :param compression: compression of request bodies.
+            One of [None, 'gzip', 'deflate']. Defaults to ``None``.
+        :param compression_threshold: min size of request body in bytes to
+            compress. Defaults to ``1024``.
+        :param compression_level: compression level from ``1`` (fastest)
+            to ``9`` (smallest). Defaults to ``6``.
+        :param serializer: json serializer of request and response bodies,
+            see :func:`recommendpy.serializer.get_serializer`.
+            One of [None, 'json', 'orjson', 'auto'] or object with ``dumps``
+            and ``loads`` methods. Defaults to ``None`` (``'json'``).
+        :param trace_func: function called with
+            :class:`recommendpy.trace.RequestEvent` after every request.
+            Defaults to ``None``.
+        :param trace_body_size: max length of request and response bodies
+            in debug logs. Defaults to ``1024``.
+        :param retry: :class:`recommendpy.retry.RetryPolicy` object or
+            ``True`` for default policy. Defaults to ``None`` (no retries).
+        :param rate_limit: :class:`recommendpy.ratelimit.RateLimiter` object
+            or dict of its limits by endpoint group.
+            Defaults to ``None`` (requests are not paced).
+        :param background_refresh: refresh auth token in background before
+            it needs refresh, so requests do not wait for authentication.
+            Call :func:`close` to stop it. Defaults to ``False``.
+        :param credential_store: object to store tokens with ``load``,
+            ``get``, ``set`` and ``locked`` methods, replaces
+            ``credential_file_path``. Defaults to ``None``.
+        :param cache: :class:`recommendpy.cache.ResponseCache` object or
+            ``True`` for default cache of read requests.
+            Defaults to ``None`` (no cache).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if incorrect compression or serializer.
+        """
+        if compression not in COMPRESSIONS:
+            raise RecommendAPIError('Invalid parameter compression')
         self.api_url = api_url
         self.account_id = account_id
         self.get_token_func = get_token_func
         self.set_token_func = set_token_func
         self.credential_file_path = credential_file_path
+        if credential_store is None and credential_file_path:
+            from .credentials import FileCredentialStore
+
+            credential_store = FileCredentialStore(credential_file_path)
+        self.credential_store = credential_store
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.serializer = get_serializer(serializer)
+        self.trace_func = trace_func
+        self.trace_body_size = trace_body_size
+        if retry is True:
+            from .retry import RetryPolicy
+
+            retry = RetryPolicy()
+        self.retry = retry
+        self.retries = 0
+        self._retries_lock = threading.Lock()
+        if isinstance(rate_limit, dict):
+            from .ratelimit import RateLimiter
+
+            rate_limit = RateLimiter(rate_limit)
+        self.rate_limit = rate_limit
+        if cache is True:
+            from .cache import ResponseCache
+
+            cache = ResponseCache()
+        self.cache = cache
+        self._attribute_apis = {}
+        self._attribute_mapping_apis = {}
+        self.batch_limits = {}
+        self.tokens = {}
+        self.is_auth_token_setted = False
+        self.auth_header = None
+        self._token_lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self.background_refresh = background_refresh
+        self._refresher = None
+        self._closed = threading.Event()
+
+        if auth_token:
+            self.set_auth_token(auth_token)
+
+    @cached_property
+    def _session(self):
+        return self.create_session()
+
+    def create_session(self):
+        import requests  # imported on first request, not with the package
 
-        self._session = requests.Session()
-        self._session.headers.update({
+        session = requests.Session()
+        session.headers.update({
             'Accept': 'application/json',
             'Content-Type': 'application/json',
         })
-        if auth_token:
-            self.set_auth_token(auth_token)
-        self.map_apis()
+        return session
+
+    def close(self):
+        """Stop background refresh and close underlying connections."""
+        self._closed.set()
+        if '_session' in self.__dict__:
+            self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def set_auth_token(self, token=None):
-        if not token:
-            token = self.get_token('auth')
-        self.tokens['auth'] = token
-        if not token:
-            raise RecommendTokenError('Invalid or empty token')
-
-        self.is_auth_token_setted = True
-        self._session.headers.update({
-            'Authorization': 'Bearer {}'.format(token.token),
-        })
+        with self._token_lock:
+            if not token:
+                token = self.get_token('auth')
+            self.tokens['auth'] = token
+            if not token:
+                raise RecommendTokenError('Invalid or empty token')
+
+            self.auth_header = 'Bearer {}'.format(token.token)
+            self.is_auth_token_setted = True
+
+    def add_auth_header(self, args):
+        r"""
+        Add the auth header to arguments of request.
+
+        :param args: keyword arguments of request (required).
+        """
+        if self.auth_header is None:
+            return
+        headers = dict(args.get('headers') or {})
+        headers.setdefault('Authorization', self.auth_header)
+        args['headers'] = headers
 
     def service_url(self, name):
         return '{api_url}/{account_id}/{service}'.format(
@@ -85,39 +247,30 @@ class RecommendAPI(object):
     def get_token(self, token_type, try_to_load=True):
         if self.get_token_func:
             return self.get_token_func(token_type)
-        try:
-            return self.tokens[token_type]
-        except KeyError:
-            if try_to_load:
-                self.load_tokens()
-                return self.get_token(token_type, False)
+        with self._token_lock:
+            try:
+                return self.tokens[token_type]
+            except KeyError:
+                if try_to_load:
+                    self.load_tokens()
+                    return self.get_token(token_type, False)
         return None
 
     def load_tokens(self):
-        if not self.credential_file_path:
+        if self.credential_store is None:
             raise RecommendTokenError('Credential file path is invalid')
-        try:
-            with open(self.credential_file_path, 'r') as f:
-                data = json.load(f)
-                for k, v in data.items():
-                    token = RecommendAPIToken()
-                    token.set_from_dict(v, True)
-                    self.tokens[k] = token
-        except OSError:  # NOQA
-            pass
-        except json.JSONDecodeError as e:
-            raise RecommendTokenError(str(e))
+        tokens = self.credential_store.load()
+        with self._token_lock:
+            self.tokens.update(tokens)
 
     def set_token(self, token_type, token):
         if self.set_token_func:
             return self.set_token_func(token_type, token)
-        self.load_tokens()
-
-        self.tokens[token_type] = token
-
-        with open(self.credential_file_path, 'w') as f:
-            data = {k: v.to_dict() for k, v in self.tokens.items()}
-            json.dump(data, f)
+        if self.credential_store is None:
+            raise RecommendTokenError('Credential file path is invalid')
+        self.credential_store.set(token_type, token)
+        with self._token_lock:
+            self.tokens[token_type] = token
 
     def update_tokens(self, data, update_refresh_token=True):
         if data.get('result'):
@@ -157,53 +310,451 @@ class RecommendAPI(object):
             update_refresh_token=update_refresh_token
         )
 
-    def send(self, method, name, data=None, raw=False, **args):
+    def check_auth_token(self):
+        r"""
+        Make sure a valid auth token is set before calling the api.
+
+        Sets the auth token if it is not set yet, refreshes it when it is
+        expired or close to expiration.
+
+        Concurrent refreshes are merged into one: callers with an expired
+        token wait for the caller which refreshes it, callers with a token
+        close to expiration keep using it while another caller refreshes.
+
+        :raises: :class:`recommendpy.exceptions.RecommendUnauthorizedError`
+            if auth token is not set.
+        """
+        if not self.is_auth_token_setted:
+            self.set_auth_token()
+        if self.background_refresh and self._refresher is None:
+            self.start_background_refresh()
+
+        token = self.tokens['auth']
+        if token.is_expired:
+            with self._refresh_lock:
+                if self.tokens['auth'] is token:
+                    self.refresh_auth_token(token)
+        elif token.need_refresh and self._refresh_lock.acquire(False):
+            try:
+                if self.tokens['auth'] is token:
+                    self.refresh_auth_token(token)
+            except RecommendAPIError as e:
+                log.exception(e)
+            finally:
+                self._refresh_lock.release()
+        if not self.is_auth_token_setted:
+            raise RecommendUnauthorizedError('Set auth token')
+
+    def get_stored_auth_token(self, token):
+        r"""
+        Return auth token refreshed by another process.
+
+        :param token: current auth token (required).
+
+        :return: :class:`recommendpy.token.RecommendAPIToken` object or
+            ``None`` if the stored token is the same or needs refresh too.
+        """
+        if self.credential_store is None or self.get_token_func:
+            return None
+        stored = self.credential_store.get('auth')
+        if stored is None or stored.token == token.token or \
+                stored.need_refresh:
+            return None
+        return stored
+
+    def refresh_auth_token(self, token):
+        r"""
+        Refresh auth token and set it.
+
+        The refresh is done under the lock of credential store, a token
+        refreshed by another process meanwhile is reused.
+
+        :param token: current auth token (required).
+        """
+        if self.credential_store is None or self.get_token_func:
+            self.refresh_token()
+            self.set_auth_token()
+            return
+        with self.credential_store.locked():
+            stored = self.get_stored_auth_token(token)
+            if stored is not None:
+                self.load_tokens()
+                self.set_auth_token(stored)
+                return
+            self.refresh_token()
+            self.set_auth_token()
+
+    def next_refresh_delay(self):
+        r"""
+        Return delay in seconds before the auth token needs refresh.
+        """
+        token = self.tokens.get('auth')
+        if token is None:
+            return BACKGROUND_REFRESH_RETRY
+        return max(BACKGROUND_REFRESH_MIN_DELAY, token.refresh_in)
+
+    def start_background_refresh(self):
+        r"""
+        Start background refresh of the auth token.
+
+        Called by :func:`check_auth_token` if ``background_refresh``
+        is set.
+        """
+        with self._token_lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop,
+                name='recommendpy-token-refresh',
+                daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        delay = self.next_refresh_delay()
+        while not self._closed.wait(delay):
+            token = self.tokens.get('auth')
+            try:
+                with self._refresh_lock:
+                    if token is not None and token.need_refresh and \
+                            self.tokens.get('auth') is token:
+                        self.refresh_auth_token(token)
+            except Exception as e:
+                log.exception(e)
+                delay = BACKGROUND_REFRESH_RETRY
+            else:
+                delay = self.next_refresh_delay()
+
+    def send(
+        self, method, name, data=None, raw=False, stream=False,
+        idempotent=None, **args
+    ):
+        r"""
+        Send request to api.
+
+        :param method: http method of request (required).
+        :param name: relative path of request (required).
+        :param data: data to send as json. Defaults to ``None``.
+        :param raw: return response object as is. Defaults to ``False``.
+        :param stream: decode ``result.data`` of response item by item
+            while it is read from the socket.
+            Returns :class:`recommendpy.stream.RecommendResultStream`.
+            Defaults to ``False``.
+        :param idempotent: request can be safely retried.
+            Defaults to ``None`` (detected by method and endpoint, see
+            :func:`recommendpy.retry.is_idempotent`).
+        :param \**args: additional keyword arguments are passed to requests.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: result of response.json().
+        """
+        from .retry import get_transport_errors, is_idempotent
+
         # args = {}
+        self.add_auth_header(args)
         if data is not None:
-            args['data'] = json.dumps(data)
-        response = getattr(self._session, method)(
-            self.service_url(name),
-            verify=True,
-            **args
+            args['data'] = self.serializer.dumps(data)
+        if self.need_compression(args.get('data')):
+            self.compress_body(args)
+        if stream:
+            args['stream'] = True
+        if idempotent is None:
+            idempotent = is_idempotent(method, name)
+        attempt = 0
+        while True:
+            if self.rate_limit is not None:
+                self.rate_limit.acquire(name)
+            started = time.monotonic()
+            try:
+                response = getattr(self._session, method)(
+                    self.service_url(name),
+                    verify=True,
+                    **args
+                )
+            except get_transport_errors().base as e:
+                if self.trace_func:
+                    self.trace(method, name, args, None, started, e, attempt)
+                delay = self.retry_delay(attempt, idempotent, error=e)
+                if delay is None:
+                    raise
+            else:
+                if self.trace_func:
+                    self.trace(
+                        method, name, args, response, started, None, attempt
+                    )
+                delay = self.retry_delay(attempt, idempotent, response)
+                if delay is None:
+                    break
+                response.close()
+            attempt += 1
+            self.log_retry(method, name, attempt, delay)
+            time.sleep(delay)
+        if stream and not raw:
+            return self.process_stream_response(method, name, args, response)
+        return self.process_response(method, name, args, response, raw)
+
+    def send_cached(self, name, **args):
+        r"""
+        Send get request through :attr:`cache`.
+
+        :param name: relative path of request (required).
+        :param \**args: additional keyword arguments are passed to
+            :func:`send`.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: result of response.json().
+        """
+        if self.cache is None or args.get('raw') or args.get('stream'):
+            return self.send('get', name, **args)
+        key, entry = self.get_cache_entry(name, args)
+        if entry is not None and entry.is_fresh:
+            return entry.value
+        response = self.send('get', name, raw=True, **args)
+        return self.cache_response(key, response, entry)
+
+    def get_cache_entry(self, name, args):
+        r"""
+        Return key and cached entry of request.
+
+        Adds ``If-None-Match`` header to ``args`` if the entry can be
+        revalidated.
+
+        :param name: relative path of request (required).
+        :param args: keyword arguments of request (required).
+        """
+        key = self.cache.make_key(name, args.get('params'))
+        entry = self.cache.get(key)
+        if entry is not None and not entry.is_fresh and entry.etag:
+            headers = dict(args.get('headers') or {})
+            headers['If-None-Match'] = entry.etag
+            args['headers'] = headers
+        return key, entry
+
+    def cache_response(self, key, response, entry=None):
+        r"""
+        Return result of response and save it to cache.
+
+        :param key: key of request (required).
+        :param response: response object (required).
+        :param entry: revalidated cache entry. Defaults to ``None``.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+        """
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key)
+            return entry.value
+        try:
+            data = self.serializer.loads(response.content)
+        except ValueError:
+            raise RecommendAPIError(response=response)
+        result = self.get_result(response, data)
+        self.cache.set(key, result, response.headers.get('ETag'))
+        return result
+
+    def retry_delay(self, attempt, idempotent, response=None, error=None):
+        r"""
+        Return delay before retry of failed request.
+
+        :param attempt: count of previous retries of request (required).
+        :param idempotent: request can be safely retried (required).
+        :param response: response object. Defaults to ``None``.
+        :param error: exception raised by transport. Defaults to ``None``.
+
+        :return: delay in seconds or ``None`` if request should not be
+            retried.
+        """
+        if self.retry is None:
+            return None
+        if error is None and response.status_code < 400:
+            return None
+        return self.retry.get_delay(
+            attempt + 1, idempotent, response=response, error=error
         )
 
-        if raw:
+    def log_retry(self, method, name, attempt, delay):
+        r"""
+        Count and log retry of request.
+
+        :param method: http method of request (required).
+        :param name: relative path of request (required).
+        :param attempt: number of retry (required).
+        :param delay: delay before retry in seconds (required).
+        """
+        with self._retries_lock:
+            self.retries += 1
+        log.warning(
+            'Retry #%s of %s:%s in %.2fs.', attempt, method, name, delay
+        )
+
+    def trace(
+        self, method, name, args, response, started, error=None, retries=0
+    ):
+        r"""
+        Call ``trace_func`` with :class:`recommendpy.trace.RequestEvent`.
+
+        :param method: http method of request (required).
+        :param name: relative path of request (required).
+        :param args: keyword arguments of request (required).
+        :param response: response object or ``None`` (required).
+        :param started: ``time.monotonic()`` before request (required).
+        :param error: exception raised by transport. Defaults to ``None``.
+        :param retries: count of previous attempts of request.
+            Defaults to ``0``.
+        """
+        from .trace import RequestEvent
+
+        # the async client sends the body as ``content``
+        body = args.get('data', args.get('content'))
+        event = RequestEvent(
+            method, name,
+            bytes_sent=len(body) if isinstance(body, (str, bytes)) else 0,
+            duration=time.monotonic() - started,
+            error=error,
+            retries=retries
+        )
+        if response is not None:
+            event.status = response.status_code
+            if args.get('stream'):
+                length = response.headers.get('Content-Length')
+                event.bytes_received = int(length) if length else None
+            else:
+                event.bytes_received = len(response.content)
+        try:
+            self.trace_func(event)
+        except Exception as e:
+            log.exception(e)
+
+    def log_request(self, method, name, args, response):
+        r"""
+        Log request and truncated response if debug logging is enabled.
+
+        :param method: http method of request (required).
+        :param name: relative path of request (required).
+        :param args: keyword arguments of request (required).
+        :param response: response object or decoded response (required).
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            from .trace import redact_args, trace_repr
+
             log.debug(
-                'Request: {method}:{name}:{args}.\n Response: {response}.'
-                .format(method=method, name=name, args=args, response=response)
+                'Request: %s:%s:%s.\n Response: %s.',
+                method, name,
+                trace_repr(redact_args(args), self.trace_body_size),
+                trace_repr(response, self.trace_body_size)
             )
+
+    def need_compression(self, body):
+        r"""
+        Check if request body should be compressed.
+
+        :param body: request body (required).
+        """
+        return bool(
+            self.compression and isinstance(body, (str, bytes)) and
+            len(body) >= self.compression_threshold
+        )
+
+    def compress_body(self, args):
+        r"""
+        Compress request body and set ``Content-Encoding`` header.
+
+        :param args: keyword arguments of request with body in ``data``
+            (required).
+        """
+        body = args['data']
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if self.compression == 'gzip':
+            import gzip
+
+            body = gzip.compress(body, self.compression_level, mtime=0)
+        else:
+            import zlib
+
+            body = zlib.compress(body, self.compression_level)
+        headers = dict(args.get('headers') or {})
+        headers['Content-Encoding'] = self.compression
+        args['data'] = body
+        args['headers'] = headers
+
+    def process_stream_response(self, method, name, args, response):
+        r"""
+        Check streamed response of api and return its result stream.
+
+        :param method: http method of request (required).
+        :param name: relative path of request (required).
+        :param args: keyword arguments of request (required).
+        :param response: streamed response object (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: :class:`recommendpy.stream.RecommendResultStream`.
+        """
+        if response.status_code >= 400:
+            # error responses are small, read and check them as usual
+            return self.process_response(method, name, args, response)
+        from .stream import RecommendResultStream
+
+        self.log_request(method, name, args, response)
+        return RecommendResultStream(response)
+
+    def process_response(self, method, name, args, response, raw=False):
+        r"""
+        Check response of api and return its result.
+
+        :param method: http method of request (required).
+        :param name: relative path of request (required).
+        :param args: keyword arguments of request (required).
+        :param response: response object (required).
+        :param raw: return response object as is. Defaults to ``False``.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: result of response.json().
+        """
+        if raw:
+            self.log_request(method, name, args, response)
             return response
 
         try:
-            data = response.json()
-            log.debug(
-                'Request: {method}:{name}:{args}.\n Response: {data}.'
-                .format(method=method, name=name, args=args, data=data)
-            )
-        except json.JSONDecodeError:
-            log.debug(
-                'Request: {method}:{name}:{args}.\n Response: {response}.'
-                .format(method=method, name=name, args=args, response=response)
-            )
+            data = self.serializer.loads(response.content)
+            self.log_request(method, name, args, data)
+        except ValueError:
+            self.log_request(method, name, args, response)
             raise RecommendAPIError(response=response)
+        return self.get_result(response, data)
+
+    def get_result(self, response, data):
+        r"""
+        Check decoded response of api and return its result.
 
+        :param response: response object (required).
+        :param data: decoded response (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: result of response.json().
+        """
         if response.status_code == 404:
-            raise RecommendNotFoundError(response=response)
+            raise RecommendNotFoundError(response=response, data=data)
         elif response.status_code == 401:
-            raise RecommendUnauthorizedError(response=response)
+            raise RecommendUnauthorizedError(response=response, data=data)
         if response.status_code >= 400:
-            raise RecommendAPIError(response=response)
+            raise RecommendAPIError(response=response, data=data)
 
         if not data:
             raise RecommendAPIError(response=response)
         if data.get('batch_error_list'):
-            raise RecommendBatchErrorList(response=response)
+            raise RecommendBatchErrorList(response=response, data=data)
 
         try:
             if data and data['error_message']:
                 raise RecommendAPIError(
                     message=data['error_message'],
-                    response=response
+                    response=response,
+                    data=data
                 )
         except (TypeError, KeyError):
             pass
@@ -214,53 +765,175 @@ class RecommendAPI(object):
         except KeyError:
             pass
 
-        raise RecommendAPIError(response=response)
+        raise RecommendAPIError(response=response, data=data)
+
+    def attribute(self, entity_type):
+        r"""
+        Return Attribute API of entity type.
+
+        Instances are created once per entity type.
+
+        :param entity_type: Identifier of entity type (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if incorrect entity_type.
+
+        :return: :class:`recommendpy.api.attribute.AttributeAPI` object.
+        """
+        try:
+            return self._attribute_apis[entity_type]
+        except KeyError:
+            pass
+        api = AttributeAPI(self, ATTRIBUTE_ENDPOINT, entity_type=entity_type)
+        return self._attribute_apis.setdefault(entity_type, api)
+
+    def attribute_store_mapping(self, entity_type, attribute_code):
+        r"""
+        Return Attribute Store Mapping API of attribute.
+
+        Instances are created once per entity type and attribute code.
+
+        :param entity_type: Identifier of entity type (required).
+        :param attribute_code: Identifier of attribute (required).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if incorrect entity_type.
+
+        :return: :class:`recommendpy.api.attribute.AttributeStoreMappingAPI`
+            object.
+        """
+        key = (entity_type, attribute_code)
+        try:
+            return self._attribute_mapping_apis[key]
+        except KeyError:
+            pass
+        api = AttributeStoreMappingAPI(
+            self, ATTRIBUTE_STORE_MAPPING_ENDPOINT,
+            entity_type=entity_type,
+            attribute_code=attribute_code
+        )
+        return self._attribute_mapping_apis.setdefault(key, api)
+
+    def batch_limit(self, name):
+        r"""
+        Return limit of batch size learned for endpoint.
+
+        Bulk uploads of the client share it, so batches following a split
+        one are sent in parts of the largest accepted size.
+
+        :param name: relative path of batch endpoint (required).
+
+        :return: :class:`recommendpy.batch.BatchSizeLimit` object.
+        """
+        try:
+            return self.batch_limits[name]
+        except KeyError:
+            pass
+        from .batch import BatchSizeLimit
+
+        return self.batch_limits.setdefault(name, BatchSizeLimit())
+
+    def get_attributes(
+        self, entity_types=None, concurrency=DEFAULT_CONCURRENCY, **kw
+    ):
+        r"""
+        Return attributes of several entity types indexed by code.
+
+        Attributes of entity types are requested concurrently.
+
+        :param entity_types: list of entity types.
+            Defaults to ``None`` (all entity types).
+        :param concurrency: max count of concurrent requests.
+            Defaults to ``4``.
+        :param \**kw: additional keyword arguments are passed to requests.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`.
+
+        :return: dict of dicts of attributes by code by entity type.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        entity_types = entity_types or ATTRIBUTE_TYPES
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = executor.map(
+                lambda entity_type: self.attribute(entity_type).list(**kw),
+                entity_types
+            )
+            return {
+                entity_type: index_attributes(attributes)
+                for entity_type, attributes in zip(entity_types, results)
+            }
 
     def map_apis(self):
-        # Access and Authentication API
-        self.authenticate = AuthenticateAPI(self, 'authenticate')
-
-        # Contact API
-        self.contact = ContactAPI(self, 'contact')
-        self.contact.batch = ContactBatchAPI(self, 'contact/batch')
-        self.contact.segment = ContactSegmentAPI(self, 'contact/segment')
-        self.contact.list = ContactListAPI(self, 'contact/list')
-
-        # Messaging API
-        self.messaging = MessagingAPI(self, 'messaging')
-        self.messaging.channel_batch = MessagingChannelBatchAPI(
+        r"""
+        Create all api namespaces at once.
+
+        Namespaces are created lazily on first access, call this method to
+        create them eagerly, e.g. before forking workers.
+        """
+        for name in API_NAMESPACES:
+            getattr(self, name)
+
+    # Access and Authentication API
+    @cached_property
+    def authenticate(self):
+        return AuthenticateAPI(self, 'authenticate')
+
+    # Contact API
+    @cached_property
+    def contact(self):
+        contact = ContactAPI(self, 'contact')
+        contact.batch = ContactBatchAPI(self, 'contact/batch')
+        contact.segment = ContactSegmentAPI(self, 'contact/segment')
+        contact.list = ContactListAPI(self, 'contact/list')
+        return contact
+
+    # Messaging API
+    @cached_property
+    def messaging(self):
+        messaging = MessagingAPI(self, 'messaging')
+        messaging.channel_batch = MessagingChannelBatchAPI(
             self, 'messaging/channel/batch'
         )
-        self.messaging.channel_email = MessagingChannelEmailAPI(
+        messaging.channel_email = MessagingChannelEmailAPI(
             self, 'messaging/channel/email'
         )
-        self.messaging.channel_push = MessagingChannelPushAPI(
+        messaging.channel_push = MessagingChannelPushAPI(
             self, 'messaging/channel/push'
         )
-
-        # Order API
-        self.order = OrderAPI(self, 'order')
-
-        # Core API
-        self.config = ConfigAPI(self, 'config')
-        self.store = StoreAPI(self, 'store')
-        self.webhook = WebhookAPI(self, 'webhook')
-
-        # Attribute API
-        self.attribute = lambda entity_type: AttributeAPI(
-            self, 'attribute/{entity_type}', entity_type=entity_type
-        )
-        self.attribute_store_mapping = lambda entity_type, attribute_code: \
-            AttributeStoreMappingAPI(
-                self,
-                'attribute/{entity_type}/{attribute_code}'
-                '/store/{store_code}/mapping',
-                entity_type=entity_type,
-                attribute_code=attribute_code
-            )
-
-        # Catalog API
-        self.currency = CurrencyAPI(self, 'currency')
-        self.environment = EnvironmentAPI(self, 'environment')
-        self.price_list = PriceListAPI(self, 'price_list')
-        self.catalog_upload = CatalogUploadAPI(self, 'catalog/upload')
+        return messaging
+
+    # Order API
+    @cached_property
+    def order(self):
+        return OrderAPI(self, 'order')
+
+    # Core API
+    @cached_property
+    def config(self):
+        return ConfigAPI(self, 'config')
+
+    @cached_property
+    def store(self):
+        return StoreAPI(self, 'store')
+
+    @cached_property
+    def webhook(self):
+        return WebhookAPI(self, 'webhook')
+
+    # Catalog API
+    @cached_property
+    def currency(self):
+        return CurrencyAPI(self, 'currency')
+
+    @cached_property
+    def environment(self):
+        return EnvironmentAPI(self, 'environment')
+
+    @cached_property
+    def price_list(self):
+        return PriceListAPI(self, 'price_list')
+
+    @cached_property
+    def catalog_upload(self):
+        return CatalogUploadAPI(self, 'catalog/upload')
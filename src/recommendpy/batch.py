@@ -0,0 +1,639 @@
+import json
+import threading
+import time
+
+from .exceptions import RecommendAPIError, RecommendBatchErrorList
+
+import logging
+log = logging.getLogger('recommendpy')
+
+__all__ = [
+    'BatchChunkResult',
+    'BatchReport',
+    'BatchSizeLimit',
+    'SyncReport',
+    'ThroughputMixin',
+    'iter_chunks',
+    'iter_field_chunks',
+    'run_batches',
+]
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MIN_CHUNK_SIZE = 10
+# interval in seconds of throughput logging of long uploads and exports
+PROGRESS_INTERVAL = 10
+
+# statuses of batches which may succeed when split
+OVERSIZED_STATUSES = (408, 413, 502, 504)
+
+
+def iter_chunks(
+    records, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=DEFAULT_CHUNK_BYTES,
+    dumps=json.dumps
+):
+    r"""
+    Split records into chunks.
+
+    Records are read from ``records`` lazily, only one chunk is kept in
+    memory. A record bigger than ``max_bytes`` is sent in its own chunk.
+
+    :param records: iterable of records (required).
+    :param chunk_size: max count of records in chunk.
+        Defaults to ``1000``.
+    :param max_bytes: max size of serialized chunk in bytes.
+        Defaults to ``4194304``.
+    :param dumps: function used to serialize a record, e.g.
+        ``RecommendAPI.serializer.dumps``. Defaults to ``json.dumps``.
+
+    :return: generator for chunks.
+    :yields: tuple of list of records and size of serialized chunk.
+    """
+    chunk = []
+    size = 2  # []
+    for record in records:
+        record_size = len(dumps(record)) + 2  # separator
+        if chunk and (
+            len(chunk) >= chunk_size or size + record_size > max_bytes
+        ):
+            yield chunk, size - 2
+            chunk = []
+            size = 2
+        chunk.append(record)
+        size += record_size
+    if chunk:
+        yield chunk, size - 2
+
+
+def iter_field_chunks(
+    fields, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=DEFAULT_CHUNK_BYTES,
+    dumps=json.dumps
+):
+    r"""
+    Split records of several fields into chunks of one field each.
+
+    :param fields: dict of iterables of records by field (required).
+    :param chunk_size: max count of records in chunk.
+        Defaults to ``1000``.
+    :param max_bytes: max size of serialized chunk in bytes.
+        Defaults to ``4194304``.
+    :param dumps: function used to serialize a record.
+        Defaults to ``json.dumps``.
+
+    :return: generator for chunks.
+    :yields: tuple of list of records, size of serialized chunk and field.
+    """
+    for field, records in fields.items():
+        if not records:
+            continue
+        for chunk, size in iter_chunks(records, chunk_size, max_bytes, dumps):
+            yield chunk, size, field
+
+
+class BatchSizeLimit(object):
+    r"""
+    Largest count of records accepted by a batch endpoint.
+
+    Nothing is limited until a batch is rejected as too large. After that
+    the biggest accepted batch smaller than the smallest rejected one is
+    the limit, or half of the smallest rejected batch if none was accepted
+    yet. A rejected batch not bigger than the accepted one forgets it.
+    """
+
+    def __init__(self):
+        self.rejected = None
+        self.accepted = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        rejected = self.rejected
+        if rejected is None:
+            return None
+        return self.accepted or max(rejected // 2, 1)
+
+    def failed(self, count):
+        r"""
+        Save count of records of batch rejected as too large.
+
+        :param count: count of records (required).
+        """
+        with self._lock:
+            if self.rejected is None or count < self.rejected:
+                self.rejected = count
+                if self.accepted >= count:
+                    self.accepted = 0
+
+    def succeeded(self, count):
+        r"""
+        Save count of records of accepted batch.
+
+        :param count: count of records (required).
+        """
+        with self._lock:
+            if self.rejected is not None and self.accepted < count < (
+                self.rejected
+            ):
+                self.accepted = count
+
+    def __repr__(self):
+        return '<BatchSizeLimit size={}>'.format(self.size)
+
+
+def is_oversized_error(error):
+    r"""
+    Check if batch failed because of its size.
+
+    ``413`` responses, gateway timeouts and read timeouts are counted.
+
+    :param error: exception raised by sending batch (required).
+    """
+    from .retry import get_transport_errors
+
+    if isinstance(error, RecommendAPIError):
+        response = error.response
+        return (
+            response is not None and
+            response.status_code in OVERSIZED_STATUSES
+        )
+    return isinstance(error, get_transport_errors().read_timeout)
+
+
+class BatchChunkResult(object):
+    """Result of upload of one chunk."""
+
+    def __init__(self, index, records, size, field=None):
+        r"""
+        Initialize BatchChunkResult object.
+
+        :param index: index of chunk (required).
+        :param records: list of records of chunk (required).
+        :param size: size of serialized chunk in bytes (required).
+        :param field: field of records, e.g. type of identifiers.
+            Defaults to ``None``.
+        """
+        self.index = index
+        self.records = records
+        self.count = len(records)
+        self.size = size
+        self.field = field
+        self.started_at = None
+        self.duration = None
+        self.result = None
+        self.error = None
+        self.item_errors = []
+        # ranges of positions of records in chunk
+        self.accepted = []
+        self.unmapped = []
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def permanent_errors(self):
+        return [item for item in self.item_errors if not item[1].is_transient]
+
+    @property
+    def retry_records(self):
+        r"""
+        Records to send again.
+
+        Records which are not in ``accepted``: the not accepted parts of a
+        failed chunk and the records of transient item errors if a part
+        was accepted with ``batch_error_list``. A part whose transient
+        item errors are not matched to records is sent again whole.
+        """
+        return [self.records[index] for index in self.pending_positions()]
+
+    def pending_positions(self, skip_unmapped=False):
+        r"""
+        Return positions of records which are not accepted.
+
+        ``accepted`` are ranges of records accepted by the api, items
+        failed with permanent errors included, ``unmapped`` are ranges of
+        parts accepted with transient item errors not matched to records.
+
+        :param skip_unmapped: do not return records of ``unmapped``
+            ranges, they may be accepted already. Defaults to ``False``.
+
+        :return: sorted list of positions in ``records``.
+        """
+        if self.ok:
+            return []
+        ranges = self.accepted
+        if skip_unmapped:
+            ranges = ranges + self.unmapped
+        positions = []
+        position = 0
+        for start, stop in sorted(ranges):
+            positions.extend(range(position, start))
+            position = max(position, stop)
+        positions.extend(range(position, self.count))
+        return positions
+
+    def merge(self, result, positions, skip_unmapped=False):
+        r"""
+        Return result of chunk updated with result of sending it again.
+
+        :param result: :class:`BatchChunkResult` of records sent again
+            (required).
+        :param positions: positions of records sent again (required).
+        :param skip_unmapped: ``unmapped`` ranges were not sent again.
+            Defaults to ``False``.
+
+        :return: :class:`BatchChunkResult` object.
+        """
+        merged = BatchChunkResult(
+            self.index, self.records, self.size, self.field
+        )
+        merged.started_at = result.started_at
+        merged.duration = result.duration
+        merged.result = result.result
+        merged.accepted = self.accepted + _translate_ranges(
+            result.accepted, positions
+        )
+        merged.unmapped = (
+            self.unmapped if skip_unmapped else []
+        ) + _translate_ranges(result.unmapped, positions)
+        if len(positions) < self.count:
+            sent = set(id(self.records[index]) for index in positions)
+            merged.item_errors = [
+                (record, error) for record, error in self.item_errors
+                if (
+                    record is None and skip_unmapped or
+                    record is not None and id(record) not in sent
+                )
+            ]
+        merged.item_errors += result.item_errors
+        merged.error = result.error
+        if merged.ok and (merged.item_errors or merged.unmapped):
+            merged.error = self.error
+        if merged.ok:
+            merged.records = None
+        return merged
+
+    def __repr__(self):
+        return '<BatchChunkResult #{} records={} duration={:.3f} {}>'.format(
+            self.index, self.count, self.duration or 0,
+            'ok' if self.ok else 'error={!r}'.format(self.error)
+        )
+
+
+class ThroughputMixin(object):
+    """Rates of object with ``records``, ``bytes`` and ``elapsed``."""
+
+    @property
+    def records_per_second(self):
+        elapsed = self.elapsed
+        return self.records / elapsed if elapsed else 0
+
+    @property
+    def bytes_per_second(self):
+        elapsed = self.elapsed
+        return self.bytes / elapsed if elapsed else 0
+
+
+class BatchReport(ThroughputMixin):
+    """Aggregated result of chunked upload."""
+
+    def __init__(self):
+        self.chunks = []
+        self.records = 0
+        self.bytes = 0
+        self.failed_chunks = 0
+        self.elapsed = 0
+        self.retries = 0
+        self._send = None
+        self._concurrency = DEFAULT_CONCURRENCY
+        self._key = None
+        self._limit = None
+        self._min_size = DEFAULT_MIN_CHUNK_SIZE
+
+    def add(self, chunk):
+        r"""
+        Add result of chunk.
+
+        Records of successful chunks are not kept.
+
+        :param chunk: :class:`BatchChunkResult` object (required).
+        """
+        if chunk.ok:
+            chunk.records = None
+        else:
+            self.failed_chunks += 1
+        self.chunks.append(chunk)
+        self.records += chunk.count
+        self.bytes += chunk.size
+
+    def retry(
+        self, concurrency=None, items_only=False, skip_unmapped=False
+    ):
+        r"""
+        Send failed chunks again, their results are replaced.
+
+        Parts of a split chunk accepted by the api are not sent again.
+        With ``items_only`` a chunk accepted with ``batch_error_list`` is
+        sent again with its transient failed items only, items failed with
+        permanent errors stay in ``item_errors`` of the chunk and are not
+        sent.
+
+        :param concurrency: max count of chunks sent at the same time.
+            Defaults to ``None`` (same as the first run).
+        :param items_only: send only the failed items of chunks.
+            Defaults to ``False`` (whole chunks).
+        :param skip_unmapped: do not send parts with transient item errors
+            not matched to records, their other items are accepted
+            already. Defaults to ``False``.
+
+        :return: self.
+        """
+        failed = []
+        for chunk in self.failed:
+            if items_only or not isinstance(
+                chunk.error, RecommendBatchErrorList
+            ):
+                positions = chunk.pending_positions(skip_unmapped)
+            else:
+                positions = list(range(chunk.count))
+            if positions:
+                failed.append((chunk, positions))
+        if not failed:
+            return self
+        retried = run_batches(
+            self._send,
+            [
+                (
+                    [chunk.records[index] for index in positions],
+                    chunk.size * len(positions) // (chunk.count or 1),
+                    chunk.field
+                )
+                for chunk, positions in failed
+            ],
+            concurrency or self._concurrency,
+            key=self._key,
+            limit=self._limit,
+            min_size=self._min_size
+        )
+        chunks = {chunk.index: chunk for chunk in self.chunks}
+        for (chunk, positions), result in zip(failed, retried.chunks):
+            chunks[chunk.index] = chunk.merge(
+                result, positions, skip_unmapped
+            )
+        self.chunks = sorted(chunks.values(), key=lambda chunk: chunk.index)
+        self.failed_chunks = len(self.failed)
+        self.elapsed += retried.elapsed
+        self.retries += 1
+        return self
+
+    @property
+    def ok(self):
+        return not self.failed_chunks
+
+    @property
+    def failed(self):
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def failed_records(self):
+        return sum(chunk.count for chunk in self.failed)
+
+    @property
+    def item_errors(self):
+        return [item for chunk in self.chunks for item in chunk.item_errors]
+
+    @property
+    def permanent_errors(self):
+        return [
+            item for chunk in self.chunks for item in chunk.permanent_errors
+        ]
+
+    def __repr__(self):
+        return (
+            '<BatchReport chunks={} records={} failed_chunks={} '
+            'elapsed={:.3f}s records/s={:.1f}>'
+        ).format(
+            len(self.chunks), self.records, self.failed_chunks,
+            self.elapsed, self.records_per_second
+        )
+
+
+class SyncReport(object):
+    """Result of membership sync."""
+
+    def __init__(self, current, desired, attached, detached):
+        r"""
+        Initialize SyncReport object.
+
+        :param current: count of members before sync (required).
+        :param desired: count of desired members (required).
+        :param attached: :class:`BatchReport` of attached identifiers
+            (required).
+        :param detached: :class:`BatchReport` of detached identifiers
+            (required).
+        """
+        self.current = current
+        self.desired = desired
+        self.attached = attached
+        self.detached = detached
+        self.elapsed = 0
+
+    @property
+    def ok(self):
+        return self.attached.ok and self.detached.ok
+
+    @property
+    def unchanged(self):
+        return self.desired - self.attached.records
+
+    def __repr__(self):
+        return (
+            '<SyncReport current={} desired={} attached={} detached={} '
+            'failed_chunks={} elapsed={:.3f}s>'
+        ).format(
+            self.current, self.desired, self.attached.records,
+            self.detached.records,
+            self.attached.failed_chunks + self.detached.failed_chunks,
+            self.elapsed
+        )
+
+
+def _to_ranges(positions):
+    ranges = []
+    for position in positions:
+        if ranges and ranges[-1][1] == position:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([position, position + 1])
+    return [tuple(item) for item in ranges]
+
+
+def _translate_ranges(ranges, positions):
+    return _to_ranges(sorted(
+        positions[index] for start, stop in ranges
+        for index in range(start, stop)
+    ))
+
+
+def _transient_positions(records, item_errors):
+    """Positions of records with transient errors, None if not known."""
+    positions = set()
+    for record, error in item_errors:
+        if not error.is_transient:
+            continue
+        index = error.index
+        if isinstance(index, int) and 0 <= index < len(records):
+            positions.add(index)
+        elif record is None:
+            return None
+        else:
+            positions.add(next(
+                position for position, item in enumerate(records)
+                if item is record
+            ))
+    return positions
+
+
+def _send_chunk(send, chunk, key=None, limit=None, min_size=1):
+    from .retry import get_transport_errors
+
+    chunk.started_at = time.time()
+    started = time.monotonic()
+    records = chunk.records
+    size = limit.size if limit is not None else None
+    if size is not None:
+        size = max(size, min_size)
+    if size and size < len(records):
+        parts = [
+            (start, records[start:start + size])
+            for start in range(0, len(records), size)
+        ]
+        parts.reverse()  # parts are popped from the end
+    else:
+        parts = [(0, records)]
+    split = len(parts) > 1
+    results = []
+    while parts:
+        start, part = parts.pop()
+        try:
+            if chunk.field is None:
+                results.append(send(part))
+            else:
+                results.append(send(part, chunk.field))
+            chunk.accepted.append((start, start + len(part)))
+        except RecommendBatchErrorList as e:
+            item_errors = e.map_records(part, key)
+            chunk.item_errors += item_errors
+            chunk.error = chunk.error or e
+            failed = _transient_positions(part, item_errors)
+            if failed is None:
+                chunk.unmapped.append((start, start + len(part)))
+            else:
+                chunk.accepted += _to_ranges(
+                    start + index for index in range(len(part))
+                    if index not in failed
+                )
+        except (RecommendAPIError, *get_transport_errors().base) as e:
+            if limit is not None and len(part) > min_size and (
+                is_oversized_error(e)
+            ):
+                limit.failed(len(part))
+                half = (len(part) + 1) // 2
+                parts += [(start + half, part[half:]), (start, part[:half])]
+                split = True
+                log.info(
+                    'Batch chunk #%s: %s records failed (%s), '
+                    'sending halves.', chunk.index, len(part), e
+                )
+                continue
+            log.warning('Batch chunk #%s failed: %s', chunk.index, e)
+            chunk.error = e
+            break
+        if limit is not None:
+            limit.succeeded(len(part))
+    if chunk.item_errors:
+        log.warning(
+            'Batch chunk #%s: %s of %s items failed.',
+            chunk.index, len(chunk.item_errors), chunk.count
+        )
+    if split:
+        chunk.result = results
+    elif results:
+        chunk.result = results[0]
+    chunk.duration = time.monotonic() - started
+    return chunk
+
+
+def run_batches(
+    send, chunks, concurrency=DEFAULT_CONCURRENCY, callback=None,
+    stop_on_error=False, key=None, limit=None,
+    min_size=DEFAULT_MIN_CHUNK_SIZE
+):
+    r"""
+    Send chunks concurrently.
+
+    Not more than ``concurrency`` chunks are taken from ``chunks`` ahead
+    of the finished ones, so memory use does not depend on the count of
+    chunks.
+
+    :param send: function which sends list of records (required).
+        Chunks with field are sent as ``send(records, field)``.
+    :param chunks: iterable of tuples of list of records and size, see
+        :func:`iter_chunks`, or of list of records, size and field, see
+        :func:`iter_field_chunks` (required).
+    :param concurrency: max count of chunks sent at the same time.
+        Defaults to ``4``.
+    :param callback: function called with :class:`BatchReport` after every
+        finished chunk. Defaults to ``None``.
+    :param stop_on_error: do not send next chunks after the first failed
+        one. Defaults to ``False``.
+    :param key: name of record field with identifier, or function returning
+        identifier of record, used to map item errors of
+        ``batch_error_list`` to records (see
+        :func:`recommendpy.exceptions.RecommendBatchErrorList.map_records`).
+        Defaults to ``None``.
+    :param limit: :class:`BatchSizeLimit` of endpoint. Chunks rejected as
+        too large (see :func:`is_oversized_error`) are split in halves and
+        sent again down to ``min_size`` records, chunks bigger than the
+        learned limit are split before sending. Defaults to ``None``
+        (chunks are not split).
+    :param min_size: min count of records in split chunk.
+        Defaults to ``10``.
+
+    :return: :class:`BatchReport` object.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    report = BatchReport()
+    report._send = send
+    report._concurrency = concurrency
+    report._key = key
+    report._limit = limit
+    report._min_size = min_size
+    started = time.monotonic()
+
+    def add(future):
+        report.add(future.result())
+        report.elapsed = time.monotonic() - started
+        if callback:
+            callback(report)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for index, chunk in enumerate(chunks):
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    add(future)
+            if stop_on_error and not report.ok:
+                break
+            pending.add(executor.submit(
+                _send_chunk, send, BatchChunkResult(index, *chunk), key,
+                limit, min_size
+            ))
+        for future in pending:
+            add(future)
+    report.chunks.sort(key=lambda chunk: chunk.index)
+    report.elapsed = time.monotonic() - started
+    return report
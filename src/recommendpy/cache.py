@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = [
+    'ResponseCache',
+]
+
+DEFAULT_TTL = 60
+DEFAULT_MAXSIZE = 1024
+
+
+class CacheEntry(object):
+    """Cached result of a read request."""
+
+    __slots__ = ('value', 'etag', 'expires')
+
+    def __init__(self, value, etag, expires):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+    @property
+    def is_fresh(self):
+        return time.monotonic() < self.expires
+
+
+class ResponseCache(object):
+    r"""
+    In-process cache of read requests of :class:`recommendpy.RecommendAPI`.
+
+    Results of ``get``/``list`` of read APIs, account config and attributes
+    are kept for the TTL of their endpoint. Creating, updating or deleting
+    an object through the same client invalidates the cached results of its
+    endpoint. Expired results with an ``ETag`` are revalidated with
+    ``If-None-Match``.
+
+    Usage::
+
+        cache = ResponseCache(ttl=60, ttls={'config': 600, 'contact': 0})
+        api = RecommendAPI(account_id, cache=cache)
+
+    .. note::
+            Changes made by other clients or by batch endpoints are seen
+            only after the TTL.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE, ttls=None):
+        r"""
+        Initialize ResponseCache object.
+
+        :param ttl: time to live of results in seconds. Defaults to ``60``.
+        :param maxsize: max count of results, least recently used results
+            are evicted. Defaults to ``1024``.
+        :param ttls: dict of TTLs by endpoint path prefix, e.g.
+            ``{'store': 600, 'attribute/product': 3600}``, ``0`` disables
+            the cache of endpoint. Defaults to ``None``.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_ttl(self, name):
+        r"""
+        Return TTL of endpoint, the longest matching prefix of ``ttls`` wins.
+
+        :param name: relative path of request (required).
+        """
+        ttl, matched = self.ttl, -1
+        for prefix, value in self.ttls.items():
+            if len(prefix) > matched and _has_prefix(name, prefix):
+                ttl, matched = value, len(prefix)
+        return ttl
+
+    def make_key(self, name, params=None):
+        r"""
+        Return key of request.
+
+        :param name: relative path of request (required).
+        :param params: query parameters of request. Defaults to ``None``.
+        """
+        if not params:
+            return name, ''
+        return name, repr(sorted(params.items()))
+
+    def get(self, key):
+        r"""
+        Return entry by key, expired entries are returned for revalidation.
+
+        :param key: key of request, see :func:`make_key` (required).
+
+        :return: :class:`CacheEntry` object or ``None``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.is_fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, etag=None):
+        r"""
+        Save result of request.
+
+        :param key: key of request, see :func:`make_key` (required).
+        :param value: result of request (required).
+        :param etag: ``ETag`` header of response. Defaults to ``None``.
+        """
+        ttl = self.get_ttl(key[0])
+        if not ttl:
+            return
+        entry = CacheEntry(value, etag, time.monotonic() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def touch(self, key):
+        r"""
+        Renew TTL of revalidated entry.
+
+        :param key: key of request, see :func:`make_key` (required).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.get_ttl(key[0])
+
+    def invalidate(self, prefix):
+        r"""
+        Remove results of endpoint and its sub-paths.
+
+        :param prefix: endpoint path (required).
+        """
+        with self._lock:
+            for key in [
+                key for key in self._entries if _has_prefix(key[0], prefix)
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        r"""Remove all results."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return '<ResponseCache size={} hits={} misses={}>'.format(
+            len(self._entries), self.hits, self.misses
+        )
+
+
+def _has_prefix(name, prefix):
+    return name == prefix or name.startswith(prefix + '/')
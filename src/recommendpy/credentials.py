@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .atomic import write_atomic
+from .exceptions import RecommendTokenError
+from .token import RecommendAPIToken
+
+__all__ = [
+    'FileCredentialStore',
+]
+
+
+class FileCredentialStore(object):
+    r"""
+    Credential file shared by processes.
+
+    The file is rewritten atomically (temporary file and ``os.replace``),
+    so readers never see a partial file and do not need locks. Writers
+    and token refreshes are serialized with ``fcntl.flock`` on
+    ``<path>.lock``, so one process refreshes the tokens and the others
+    reuse them. Parsed tokens are cached until the file changes.
+
+    Usage::
+
+        store = FileCredentialStore('/var/run/app/recommend.json')
+        api = RecommendAPI(account_id, credential_store=store)
+    """
+
+    def __init__(self, path):
+        r"""
+        Initialize FileCredentialStore object.
+
+        :param path: path of credential file (required).
+        """
+        self.path = path
+        self.lock_path = '{}.lock'.format(path)
+        self._cache = {}
+        self._cache_key = None
+        self._cache_lock = threading.Lock()
+        self._file_lock = threading.RLock()
+        self._lock_fd = None
+        self._lock_depth = 0
+
+    def _stat_key(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        r"""
+        Return tokens of the file.
+
+        The file is parsed only if it changed since the last call.
+
+        :raises: :class:`recommendpy.exceptions.RecommendTokenError`
+            if the file is invalid.
+
+        :return: dict of :class:`recommendpy.token.RecommendAPIToken`
+            objects by token type.
+        """
+        key = self._stat_key()
+        with self._cache_lock:
+            if key is not None and key == self._cache_key:
+                return dict(self._cache)
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except OSError:  # NOQA
+                return {}
+            except json.JSONDecodeError as e:
+                raise RecommendTokenError(str(e))
+            tokens = {}
+            for k, v in data.items():
+                token = RecommendAPIToken()
+                token.set_from_dict(v, True)
+                tokens[k] = token
+            self._cache = tokens
+            self._cache_key = key
+            return dict(tokens)
+
+    def get(self, token_type):
+        r"""
+        Return token by type.
+
+        :param token_type: type of token (required).
+
+        :return: :class:`recommendpy.token.RecommendAPIToken` object or
+            ``None``.
+        """
+        return self.load().get(token_type)
+
+    def set(self, token_type, token):
+        r"""
+        Save token.
+
+        :param token_type: type of token (required).
+        :param token: :class:`recommendpy.token.RecommendAPIToken` object
+            (required).
+        """
+        self.update({token_type: token})
+
+    def update(self, tokens):
+        r"""
+        Save tokens, other tokens of the file are kept.
+
+        :param tokens: dict of :class:`recommendpy.token.RecommendAPIToken`
+            objects by token type (required).
+        """
+        with self.locked():
+            data = self.load()
+            data.update(tokens)
+            write_atomic(
+                self.path,
+                json.dumps({k: v.to_dict() for k, v in data.items()}),
+                prefix='.credentials-'
+            )
+            with self._cache_lock:
+                self._cache = data
+                self._cache_key = self._stat_key()
+
+    @contextmanager
+    def locked(self):
+        r"""
+        Hold exclusive lock of the file, reentrant within a process.
+
+        File locks are skipped on systems without ``fcntl``.
+        """
+        with self._file_lock:
+            if not self._lock_depth and fcntl is not None:
+                self._lock_fd = os.open(
+                    self.lock_path, os.O_RDWR | os.O_CREAT, 0o600
+                )
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
@@ -0,0 +1,155 @@
+import json
+
+from .atomic import write_atomic
+
+__all__ = [
+    'SearchCursor',
+]
+
+# fields identifying search results, the first present one is used
+IDENTITY_FIELDS = ('id', 'customer_id', 'email', 'push_token', 'code')
+
+
+def get_identity(item, key=None):
+    r"""
+    Return identity of search result.
+
+    :param item: search result (required).
+    :param key: name of field with identity, or function returning
+        identity of result. Defaults to ``None`` (the first field of
+        ``IDENTITY_FIELDS`` present in result).
+
+    :return: identity or ``None`` if unknown.
+    """
+    if callable(key):
+        return key(item)
+    if not isinstance(item, dict):
+        return item if isinstance(item, (str, int)) else None
+    if key is not None:
+        return item.get(key)
+    for field in IDENTITY_FIELDS:
+        if field in item:
+            return item[field]
+    return None
+
+
+class SearchCursor(object):
+    r"""
+    Serializable position of :class:`recommendpy.api.base.SearchIterator`.
+
+    The cursor points to the page being read (``skip`` and ``limit``), the
+    count of its results already yielded (``position``) and the identity
+    of the last yielded result (``last``). ``filters`` are the arguments
+    of ``search``.
+
+    Usage::
+
+        iterator = api.contact.search_iterator(from_date=from_date)
+        for contact in iterator:
+            ...
+            iterator.cursor.save('contacts.cursor')
+
+        # later, after a failure
+        cursor = SearchCursor.load('contacts.cursor')
+        for contact in api.contact.search_iterator(cursor=cursor):
+            ...
+    """
+
+    def __init__(
+        self, skip=0, limit=None, filters=None, position=0, last=None,
+        done=False
+    ):
+        r"""
+        Initialize SearchCursor object.
+
+        :param skip: ``skip`` of the current page. Defaults to ``0``.
+        :param limit: page size used by the api. Defaults to ``None``.
+        :param filters: keyword arguments of ``search``.
+            Defaults to ``None``.
+        :param position: count of yielded results of the current page.
+            Defaults to ``0``.
+        :param last: identity of the last yielded result.
+            Defaults to ``None``.
+        :param done: all results are yielded. Defaults to ``False``.
+        """
+        self.skip = skip
+        self.limit = limit
+        self.filters = filters or {}
+        self.position = position
+        self.last = last
+        self.done = done
+
+    @property
+    def offset(self):
+        r"""Count of results yielded since the start of search."""
+        return self.skip + self.position
+
+    def to_dict(self):
+        return {
+            'skip': self.skip,
+            'limit': self.limit,
+            'filters': self.filters,
+            'position': self.position,
+            'last': self.last,
+            'done': self.done,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        r"""
+        Create cursor from result of :func:`to_dict`.
+
+        :param data: dict of cursor (required).
+
+        :return: :class:`SearchCursor` object.
+        """
+        return cls(
+            skip=data.get('skip', 0),
+            limit=data.get('limit'),
+            filters=data.get('filters'),
+            position=data.get('position', 0),
+            last=data.get('last'),
+            done=data.get('done', False)
+        )
+
+    def dumps(self):
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def loads(cls, data):
+        r"""
+        Create cursor from result of :func:`dumps`.
+
+        :param data: json string (required).
+
+        :return: :class:`SearchCursor` object.
+        """
+        return cls.from_dict(json.loads(data))
+
+    def save(self, path):
+        r"""
+        Write cursor to file atomically.
+
+        :param path: path of file (required).
+        """
+        write_atomic(path, self.dumps(), prefix='.cursor-')
+
+    @classmethod
+    def load(cls, path):
+        r"""
+        Read cursor from file written by :func:`save`.
+
+        :param path: path of file (required).
+
+        :return: :class:`SearchCursor` object.
+        """
+        with open(path) as f:
+            return cls.loads(f.read())
+
+    def __repr__(self):
+        return (
+            '<SearchCursor skip={} limit={} position={} last={!r}{}>'
+        ).format(
+            self.skip, self.limit, self.position, self.last,
+            ' done' if self.done else ''
+        )
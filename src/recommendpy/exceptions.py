@@ -3,21 +3,22 @@ import json
 
 class RecommendAPIError(Exception):
 
-    def __init__(self, message=None, response=None):
+    def __init__(self, message=None, response=None, data=None):
         super().__init__(response.status_code if response else 0)
         self.response = response
         self.message = message
         self.error_code = None
-        if self.response is not None:
+        if data is None and self.response is not None:
             try:
                 data = self.response.json()
             except json.JSONDecodeError:
                 data = None
-            if data:
-                if not self.message and data.get('error_message'):
-                    self.message = data['error_message']
-                if data.get('error_code'):
-                    self.error_code = data['error_code']
+        self.data = data
+        if data:
+            if not self.message and data.get('error_message'):
+                self.message = data['error_message']
+            if data.get('error_code'):
+                self.error_code = data['error_code']
 
     def __str__(self):
         if self.response:
@@ -53,18 +54,136 @@ class RecommendNotFoundError(RecommendAPIError):
     pass
 
 
+# item errors of batches which may succeed when sent again
+TRANSIENT_BATCH_ERROR_CODES = frozenset([
+    408, 409, 423, 425, 429, 500, 502, 503, 504,
+])
+TRANSIENT_BATCH_ERROR_TYPES = frozenset([
+    'conflict', 'internal', 'internal_error', 'lock', 'locked',
+    'rate_limit', 'throttled', 'timeout', 'too_many_requests', 'unavailable',
+])
+
+
 class RecommendBatchError(object):
-    def __init__(self, error_type=None, identifier=None, message=None, code=None):
+    """Error of one item of batch."""
+
+    def __init__(
+        self, error_type=None, identifier=None, message=None, code=None,
+        index=None, data=None
+    ):
         self.type = error_type
         self.identifier = identifier
         self.message = message
         self.code = code
+        self.index = index
+        self.data = data
+
+    @classmethod
+    def from_dict(cls, data):
+        r"""
+        Create error from item of ``batch_error_list``.
+
+        :param data: dict of error (required).
+
+        :return: :class:`RecommendBatchError` object.
+        """
+        if not isinstance(data, dict):
+            return cls(message=str(data), data=data)
+        return cls(
+            error_type=data.get('type', data.get('error_type')),
+            identifier=data.get('identifier'),
+            message=data.get('message', data.get('error_message')),
+            code=data.get('code', data.get('error_code')),
+            index=data.get('index'),
+            data=data
+        )
+
+    @property
+    def is_transient(self):
+        code = self.code
+        if isinstance(code, str) and code.isdigit():
+            code = int(code)
+        if code in TRANSIENT_BATCH_ERROR_CODES:
+            return True
+        return (
+            isinstance(self.type, str) and
+            self.type.lower() in TRANSIENT_BATCH_ERROR_TYPES
+        )
+
+    def __repr__(self):
+        return (
+            '<RecommendBatchError type={!r} identifier={!r} code={!r} {}>'
+        ).format(self.type, self.identifier, self.code, self.message or '')
 
 
 class RecommendBatchErrorList(RecommendAPIError):
+    """Batch was accepted, but some of its items failed."""
+
     def errors(self):
-        data = self.response.json()
-        errors = []
-        for error_data in data['batch_error_list']:
-            errors.append(RecommendBatchError(error_data))
+        r"""
+        Return errors of items.
+
+        :return: list of :class:`RecommendBatchError` objects.
+        """
+        errors = getattr(self, '_errors', None)
+        if errors is None:
+            errors = self._errors = [
+                RecommendBatchError.from_dict(error_data)
+                for error_data in (self.data or {}).get(
+                    'batch_error_list', []
+                )
+            ]
         return errors
+
+    def map_records(self, records, key=None):
+        r"""
+        Map errors of items to the records of batch.
+
+        An error is matched by its ``index`` in the batch or, if the index
+        is not present, by its ``identifier``: with the record itself
+        (batches of identifiers) or with ``record[key]``.
+
+        :param records: list of records sent in batch (required).
+        :param key: name of record field with identifier, or function
+            returning identifier of record. Defaults to ``None``.
+
+        :return: list of tuples of record (``None`` if not matched) and
+            :class:`RecommendBatchError` object.
+        """
+        by_identifier = None
+        result = []
+        for error in self.errors():
+            index = error.index
+            if isinstance(index, int) and 0 <= index < len(records):
+                result.append((records[index], error))
+                continue
+            if by_identifier is None:
+                by_identifier = {}
+                for record in records:
+                    identifier = _get_identifier(record, key)
+                    if identifier is not None:
+                        by_identifier.setdefault(identifier, record)
+            try:
+                record = by_identifier.get(error.identifier)
+            except TypeError:  # unhashable identifier
+                record = None
+            result.append((record, error))
+        return result
+
+
+def _get_identifier(record, key):
+    if callable(key):
+        return key(record)
+    if isinstance(record, dict):
+        return record.get(key) if key is not None else None
+    try:
+        hash(record)
+    except TypeError:
+        return None
+    return record
+
+
+class RecommendUploadError(RecommendAPIError):
+    def __init__(self, message=None, response=None, data=None, reports=None):
+        super().__init__(message=message, response=response, data=data)
+        self.reports = reports or {}
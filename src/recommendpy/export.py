@@ -0,0 +1,315 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import time
+
+from .batch import PROGRESS_INTERVAL, ThroughputMixin
+from .exceptions import RecommendAPIError
+
+import logging
+log = logging.getLogger('recommendpy')
+
+__all__ = [
+    'ExportReport',
+    'export',
+]
+
+FORMATS = ['jsonl', 'csv', 'parquet']
+COMPRESSIONS = [None, 'gzip', 'bz2', 'xz']
+FORMAT_EXTENSIONS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+}
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+PARQUET_BATCH_SIZE = 10000
+
+
+def guess_format(path):
+    r"""
+    Return format and compression of export file by its extensions.
+
+    :param path: path of file, e.g. ``contacts.csv.gz`` (required).
+
+    :return: tuple of format (``None`` if unknown) and compression.
+    """
+    root, ext = os.path.splitext(path.lower())
+    compression = COMPRESSION_EXTENSIONS.get(ext)
+    if compression:
+        root, ext = os.path.splitext(root)
+    return FORMAT_EXTENSIONS.get(ext), compression
+
+
+def _open_compressed(raw, compression, level):
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=level or 6)
+    if compression == 'bz2':
+        return bz2.BZ2File(raw, mode='wb', compresslevel=level or 9)
+    if compression == 'xz':
+        return lzma.LZMAFile(raw, mode='wb', preset=level)
+    return raw
+
+
+class JSONLWriter(object):
+    """Writer of JSON Lines."""
+
+    def __init__(self, f, dumps=None):
+        r"""
+        Initialize JSONLWriter object.
+
+        :param f: binary file object (required).
+        :param dumps: function serializing a row to bytes.
+            Defaults to ``None`` (``json.dumps``).
+        """
+        self.f = f
+        self.dumps = dumps or _json_dumps
+
+    def write(self, row):
+        self.f.write(self.dumps(row) + b'\n')
+
+    def close(self):
+        pass
+
+
+class CSVWriter(object):
+    r"""
+    Writer of CSV.
+
+    Columns are ``fieldnames`` or keys of the first row, keys of other rows
+    which are not columns are ignored. Nested values are written as json.
+    """
+
+    def __init__(self, f, fieldnames=None, dumps=None, **fmtparams):
+        r"""
+        Initialize CSVWriter object.
+
+        :param f: binary file object (required).
+        :param fieldnames: list of columns. Defaults to ``None``.
+        :param dumps: function serializing a nested value to bytes.
+            Defaults to ``None`` (``json.dumps``).
+        :param \**fmtparams: formatting parameters of :func:`csv.writer`.
+        """
+        self.text = io.TextIOWrapper(
+            f, encoding='utf-8', newline='', write_through=True
+        )
+        self.fieldnames = fieldnames
+        self.dumps = dumps or _json_dumps
+        self.fmtparams = fmtparams
+        self.writer = None
+
+    def write(self, row):
+        if self.writer is None:
+            self.fieldnames = self.fieldnames or list(row)
+            self.writer = csv.DictWriter(
+                self.text, self.fieldnames, extrasaction='ignore',
+                **self.fmtparams
+            )
+            self.writer.writeheader()
+        if any(isinstance(value, (dict, list)) for value in row.values()):
+            row = {
+                name: self.dumps(value).decode('utf-8')
+                if isinstance(value, (dict, list)) else value
+                for name, value in row.items()
+            }
+        self.writer.writerow(row)
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+
+
+class ParquetWriter(object):
+    r"""
+    Writer of Parquet, requires `pyarrow <https://arrow.apache.org/>`_.
+
+    Rows are written in row groups of ``batch_size`` rows, the schema is
+    inferred from the first group.
+    """
+
+    def __init__(self, f, compression=None, batch_size=PARQUET_BATCH_SIZE):
+        r"""
+        Initialize ParquetWriter object.
+
+        :param f: binary file object (required).
+        :param compression: parquet codec, e.g. ``'zstd'``.
+            Defaults to ``None`` (``'snappy'``).
+        :param batch_size: count of rows in row group.
+            Defaults to ``10000``.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if pyarrow is not installed.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RecommendAPIError('pyarrow is not installed')
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.f = f
+        self.compression = compression or 'snappy'
+        self.batch_size = batch_size
+        self.rows = []
+        self.writer = None
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.writer is None:
+            table = self._pa.Table.from_pylist(self.rows)
+            self.writer = self._pq.ParquetWriter(
+                self.f, table.schema, compression=self.compression
+            )
+        else:
+            table = self._pa.Table.from_pylist(
+                self.rows, schema=self.writer.schema
+            )
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ExportReport(ThroughputMixin):
+    """Result of export."""
+
+    def __init__(self, path, format, compression):
+        r"""
+        Initialize ExportReport object.
+
+        :param path: path of file (required).
+        :param format: format of file (required).
+        :param compression: compression of file (required).
+        """
+        self.path = path
+        self.format = format
+        self.compression = compression
+        self.rows = 0
+        self.bytes = 0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def records(self):
+        return self.rows
+
+    rows_per_second = ThroughputMixin.records_per_second
+
+    def __str__(self):
+        return (
+            '{} rows, {} bytes in {:.1f}s ({:.1f} rows/s, {:.1f} bytes/s)'
+        ).format(
+            self.rows, self.bytes, self.elapsed,
+            self.rows_per_second, self.bytes_per_second
+        )
+
+    def __repr__(self):
+        return '<ExportReport {} {}>'.format(self.path, self)
+
+
+def export(
+    rows, path, format=None, compression=None, compression_level=None,
+    fieldnames=None, dumps=None, callback=None,
+    progress_interval=PROGRESS_INTERVAL
+):
+    r"""
+    Write rows to file one by one.
+
+    Only the row being written (a row group for Parquet) is held in memory,
+    so ``rows`` may be a generator or a search iterator of any size.
+
+    Usage::
+
+        export(api.contact.search_iterator(), 'contacts.jsonl.gz')
+
+    :param rows: iterable of dicts (required).
+    :param path: path of file (required).
+    :param format: format of file. One of ['jsonl', 'csv', 'parquet'].
+        Defaults to ``None`` (by extension of ``path``).
+    :param compression: compression of file. One of [None, 'gzip', 'bz2',
+        'xz'], for Parquet a parquet codec, e.g. ``'zstd'``.
+        Defaults to ``None`` (by extension of ``path``).
+    :param compression_level: level of compression.
+        Defaults to ``None`` (default of compression).
+    :param fieldnames: list of CSV columns. Defaults to ``None``
+        (keys of the first row).
+    :param dumps: function serializing a row to bytes, e.g.
+        ``RecommendAPI.serializer.dumps``. Defaults to ``None``
+        (``json.dumps``).
+    :param callback: function called with :class:`ExportReport` every
+        ``progress_interval``. Defaults to ``None``.
+    :param progress_interval: interval in seconds of throughput logging.
+        Defaults to ``10``.
+
+    :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+        if incorrect format or compression.
+
+    :return: :class:`ExportReport` object.
+    """
+    guessed_format, guessed_compression = guess_format(path)
+    format = format or guessed_format
+    if format not in FORMATS:
+        raise RecommendAPIError('Invalid parameter format')
+    if format == 'parquet':
+        file_compression = None
+    else:
+        compression = compression or guessed_compression
+        if compression not in COMPRESSIONS:
+            raise RecommendAPIError('Invalid parameter compression')
+        file_compression = compression
+
+    report = ExportReport(path, format, compression)
+    logged_at = report.started_at
+    with open(path, 'wb') as raw:
+        f = _open_compressed(raw, file_compression, compression_level)
+        try:
+            if format == 'jsonl':
+                writer = JSONLWriter(f, dumps)
+            elif format == 'csv':
+                writer = CSVWriter(f, fieldnames, dumps)
+            else:
+                writer = ParquetWriter(f, compression)
+            for row in rows:
+                writer.write(row)
+                report.rows += 1
+                if not report.rows % 1000:
+                    now = time.monotonic()
+                    if now - logged_at >= progress_interval:
+                        logged_at = now
+                        report.bytes = raw.tell()
+                        log.info('Export to %s: %s', path, report)
+                        if callback:
+                            callback(report)
+            writer.close()
+        finally:
+            if f is not raw:
+                f.close()
+        report.bytes = raw.tell()
+    report.finished_at = time.monotonic()
+    log.info('Export to %s finished: %s', path, report)
+    return report
+
+
+def _json_dumps(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
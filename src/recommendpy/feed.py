@@ -0,0 +1,260 @@
+import csv
+import io
+import json
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import logging
+log = logging.getLogger('recommendpy')
+
+__all__ = [
+    'CSVFeed',
+    'JSONLFeed',
+]
+
+DEFAULT_RANGE_BYTES = 4 * 1024 * 1024
+
+
+def _open_mmap(path):
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _parse_jsonl(data, options):
+    loads = options.get('loads') or json.loads
+    return [loads(line) for line in data.splitlines() if line.strip()]
+
+
+def _parse_csv(data, options):
+    reader = csv.DictReader(
+        io.StringIO(data.decode(options['encoding']), newline=''),
+        fieldnames=options['fieldnames'],
+        **options['fmtparams']
+    )
+    converter = options.get('converter')
+    if converter:
+        return [converter(row) for row in reader]
+    return list(reader)
+
+
+def _parse_file_range(parser, path, start, end, options):
+    mm = _open_mmap(path)
+    try:
+        return parser(mm[start:end], options)
+    finally:
+        mm.close()
+
+
+class FileFeed(object):
+    """Base class of memory-mapped file feeds."""
+
+    parser = None
+
+    def __init__(
+        self, path, range_bytes=DEFAULT_RANGE_BYTES, processes=None
+    ):
+        r"""
+        Initialize FileFeed object.
+
+        :param path: path of feed file (required).
+        :param range_bytes: approximate size in bytes of one range of
+            the file parsed at once. Defaults to ``4194304``.
+        :param processes: count of worker processes used for parsing.
+            Defaults to ``None`` (parse in current process).
+        """
+        self.path = path
+        self.range_bytes = range_bytes
+        self.processes = processes
+        self.options = {}
+
+    def data_start(self, mm):
+        r"""
+        Return offset of the first record.
+
+        :param mm: memory-mapped file (required).
+        """
+        return 0
+
+    def find_boundary(self, mm, start, pos):
+        r"""
+        Return offset of the first record boundary at or after ``pos``.
+
+        :param mm: memory-mapped file (required).
+        :param start: offset of the range start (required).
+        :param pos: offset to search boundary from (required).
+        """
+        end = mm.find(b'\n', pos)
+        return len(mm) if end == -1 else end + 1
+
+    def ranges(self):
+        r"""
+        Split the file into ranges of whole records.
+
+        :return: generator for ranges.
+        :yields: tuple of start and end offsets.
+        """
+        mm = _open_mmap(self.path)
+        if mm is None:
+            return
+        try:
+            size = len(mm)
+            start = self.data_start(mm)
+            while start < size:
+                pos = start + self.range_bytes
+                end = size if pos >= size else self.find_boundary(
+                    mm, start, pos
+                )
+                yield start, end
+                start = end
+        finally:
+            mm.close()
+
+    def iter_batches(self):
+        r"""
+        Iterate over parsed ranges of the file.
+
+        Only the ranges being parsed are held in memory.
+
+        :return: generator for lists of records.
+        :yields: list of records of one range.
+        """
+        if self.processes:
+            for records in self._iter_batches_in_processes():
+                yield records
+            return
+        mm = _open_mmap(self.path)
+        if mm is None:
+            return
+        try:
+            for start, end in self.ranges():
+                yield self.parser(mm[start:end], self.options)
+        finally:
+            mm.close()
+
+    def _iter_batches_in_processes(self):
+        pending = deque()
+        with ProcessPoolExecutor(self.processes) as executor:
+            try:
+                for start, end in self.ranges():
+                    pending.append(executor.submit(
+                        _parse_file_range, self.parser, self.path,
+                        start, end, self.options
+                    ))
+                    if len(pending) >= self.processes * 2:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def __iter__(self):
+        for records in self.iter_batches():
+            for record in records:
+                yield record
+
+
+class JSONLFeed(FileFeed):
+    r"""
+    Memory-mapped JSON Lines feed.
+
+    Iterating over feed yields records of the file one by one, so the feed
+    can be passed to uploaders directly::
+
+        api.order.bulk(JSONLFeed('orders.jsonl', processes=4))
+    """
+
+    parser = staticmethod(_parse_jsonl)
+
+    def __init__(
+        self, path, range_bytes=DEFAULT_RANGE_BYTES, processes=None,
+        loads=None
+    ):
+        r"""
+        Initialize JSONLFeed object.
+
+        :param path: path of feed file (required).
+        :param range_bytes: approximate size in bytes of one range of
+            the file parsed at once. Defaults to ``4194304``.
+        :param processes: count of worker processes used for parsing.
+            Defaults to ``None`` (parse in current process).
+        :param loads: function used to decode a line.
+            Must be picklable if ``processes`` is set.
+            Defaults to ``json.loads``.
+        """
+        super().__init__(path, range_bytes, processes)
+        self.options = {
+            'loads': loads,
+        }
+
+
+class CSVFeed(FileFeed):
+    r"""
+    Memory-mapped CSV feed.
+
+    Records are dicts of row values by column names, use ``converter``
+    to build the api records from them::
+
+        session.upload_products(CSVFeed('products.csv', converter=product))
+    """
+
+    parser = staticmethod(_parse_csv)
+
+    def __init__(
+        self, path, range_bytes=DEFAULT_RANGE_BYTES, processes=None,
+        fieldnames=None, converter=None, encoding='utf-8', **fmtparams
+    ):
+        r"""
+        Initialize CSVFeed object.
+
+        :param path: path of feed file (required).
+        :param range_bytes: approximate size in bytes of one range of
+            the file parsed at once. Defaults to ``4194304``.
+        :param processes: count of worker processes used for parsing.
+            Defaults to ``None`` (parse in current process).
+        :param fieldnames: list of column names. Defaults to ``None``
+            (read from the first line of the file).
+        :param converter: function called with every row dict, its result
+            is used as record. Must be picklable if ``processes`` is set.
+            Defaults to ``None``.
+        :param encoding: encoding of the file. Defaults to ``utf-8``.
+        :param \**fmtparams: additional keyword arguments are passed to
+            ``csv.DictReader``.
+        """
+        super().__init__(path, range_bytes, processes)
+        self.has_header = not fieldnames
+        self.options = {
+            'fieldnames': fieldnames,
+            'converter': converter,
+            'encoding': encoding,
+            'fmtparams': fmtparams,
+        }
+
+    def data_start(self, mm):
+        if not self.has_header:
+            return 0
+        end = self.find_boundary(mm, 0, 0)
+        header = mm[:end].decode(self.options['encoding'])
+        if header.startswith('\ufeff'):
+            header = header[1:]
+        self.options['fieldnames'] = next(csv.reader(
+            io.StringIO(header, newline=''), **self.options['fmtparams']
+        ))
+        return end
+
+    def find_boundary(self, mm, start, pos):
+        # newline inside a quoted value is not a record boundary
+        quotes = mm[start:pos].count(b'"')
+        while True:
+            end = mm.find(b'\n', pos)
+            if end == -1:
+                return len(mm)
+            end += 1
+            quotes += mm[pos:end].count(b'"')
+            if not quotes % 2:
+                return end
+            pos = end
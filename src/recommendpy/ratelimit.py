@@ -0,0 +1,220 @@
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .exceptions import RecommendAPIError
+
+__all__ = [
+    'FileTokenBucket',
+    'RateLimiter',
+    'TokenBucket',
+    'endpoint_group',
+]
+
+RATE_LIMIT_GROUPS = ['search', 'batch', 'catalog', 'default']
+
+# tokens and timestamp of the last refill
+_FILE_STATE = struct.Struct('dd')
+
+
+def endpoint_group(name):
+    r"""
+    Return rate limit group of endpoint.
+
+    :param name: relative path of request (required).
+
+    :return: one of ``'search'``, ``'batch'``, ``'catalog'``, ``'default'``.
+    """
+    parts = name.split('/')
+    if parts[0] == 'catalog':
+        return 'catalog'
+    if parts[-1] == 'search':
+        return 'search'
+    for part in parts:
+        if part == 'batch' or part.endswith('_batch'):
+            return 'batch'
+    return 'default'
+
+
+class TokenBucket(object):
+    r"""
+    Token bucket shared by the threads of one process.
+
+    Callers reserve tokens in order of arrival, a caller which finds the
+    bucket empty is told how long to wait instead of polling, so the
+    requests are spread evenly at ``rate``.
+    """
+
+    def __init__(self, rate, burst=None):
+        r"""
+        Initialize TokenBucket object.
+
+        :param rate: count of tokens added per second (required).
+        :param burst: max count of tokens in bucket.
+            Defaults to ``None`` (same as ``rate``, at least ``1``).
+        """
+        if rate <= 0:
+            raise RecommendAPIError('Invalid parameter rate')
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, updated, count, now):
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        tokens -= count
+        delay = -tokens / self.rate if tokens < 0 else 0
+        return tokens, delay
+
+    def reserve(self, count=1):
+        r"""
+        Take tokens from bucket.
+
+        :param count: count of tokens. Defaults to ``1``.
+
+        :return: delay in seconds the caller must wait before the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, delay = self._take(
+                self._tokens, self._updated, count, now
+            )
+            self._updated = now
+        return delay
+
+    def acquire(self, count=1):
+        r"""
+        Take tokens from bucket and wait until they are available.
+
+        :param count: count of tokens. Defaults to ``1``.
+        """
+        delay = self.reserve(count)
+        if delay:
+            time.sleep(delay)
+
+
+class FileTokenBucket(TokenBucket):
+    r"""
+    Token bucket shared by processes of one host.
+
+    State of the bucket is kept in a small file locked with ``fcntl.flock``,
+    all processes using the same ``path`` share the budget. Available only
+    on POSIX systems.
+    """
+
+    def __init__(self, path, rate, burst=None):
+        r"""
+        Initialize FileTokenBucket object.
+
+        :param path: path of state file, created if missing (required).
+        :param rate: count of tokens added per second (required).
+        :param burst: max count of tokens in bucket.
+            Defaults to ``None`` (same as ``rate``, at least ``1``).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if file locks are not supported.
+        """
+        if fcntl is None:
+            raise RecommendAPIError('File locks are not supported')
+        super().__init__(rate, burst)
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def reserve(self, count=1):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                # wall clock, monotonic clocks are not shared by processes
+                now = time.time()
+                state = os.pread(self._fd, _FILE_STATE.size, 0)
+                if len(state) == _FILE_STATE.size:
+                    tokens, updated = _FILE_STATE.unpack(state)
+                else:
+                    tokens, updated = self.burst, now
+                tokens, delay = self._take(
+                    tokens, min(updated, now), count, now
+                )
+                os.pwrite(self._fd, _FILE_STATE.pack(tokens, now), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return delay
+
+    def close(self):
+        r"""Close state file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RateLimiter(object):
+    r"""
+    Client-side rate limiter of :class:`recommendpy.RecommendAPI`.
+
+    Every request takes a token from the bucket of its endpoint group (see
+    :func:`endpoint_group`), groups without a limit are not paced.
+
+    Usage::
+
+        limiter = RateLimiter({'search': 10, 'batch': (2, 4)})
+        api = RecommendAPI(account_id, rate_limit=limiter)
+
+    Pass ``path`` to share the budget with other processes::
+
+        RateLimiter({'default': 20}, path='/tmp/recommend-{group}.bucket')
+    """
+
+    def __init__(self, limits, path=None):
+        r"""
+        Initialize RateLimiter object.
+
+        :param limits: dict of limits by group, a limit is requests per
+            second or tuple of requests per second and burst (required).
+            Groups are [search, batch, catalog, default].
+        :param path: format string of state file path with ``{group}``
+            placeholder, enables :class:`FileTokenBucket`.
+            Defaults to ``None`` (limit only current process).
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if incorrect group.
+        """
+        self.buckets = {}
+        for group, limit in limits.items():
+            if group not in RATE_LIMIT_GROUPS:
+                raise RecommendAPIError('Invalid rate limit group')
+            rate, burst = limit if isinstance(limit, tuple) else (limit, None)
+            if path:
+                self.buckets[group] = FileTokenBucket(
+                    path.format(group=group), rate, burst
+                )
+            else:
+                self.buckets[group] = TokenBucket(rate, burst)
+
+    def reserve(self, name):
+        r"""
+        Take token for request.
+
+        :param name: relative path of request (required).
+
+        :return: delay in seconds the caller must wait before the request.
+        """
+        bucket = self.buckets.get(endpoint_group(name))
+        if bucket is None:
+            return 0
+        return bucket.reserve()
+
+    def acquire(self, name):
+        r"""
+        Take token for request and wait until it is available.
+
+        :param name: relative path of request (required).
+        """
+        delay = self.reserve(name)
+        if delay:
+            time.sleep(delay)
@@ -0,0 +1,191 @@
+import random
+import sys
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+__all__ = [
+    'RetryPolicy',
+    'get_transport_errors',
+    'is_idempotent',
+]
+
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+IDEMPOTENT_METHODS = ['get', 'put', 'delete', 'head', 'options']
+
+# connect: raised before the request reached the api, safe for any method
+# transport: raised when the request could be processed by the api
+# base: base classes of all errors of transports
+TransportErrors = namedtuple(
+    'TransportErrors', ['connect', 'transport', 'base', 'read_timeout']
+)
+
+
+def get_transport_errors():
+    r"""
+    Return exception classes of imported http transports.
+
+    ``requests`` and ``httpx`` are not imported here, a transport which is
+    not imported can not raise errors.
+
+    :return: :class:`TransportErrors` tuple.
+    """
+    return _get_transport_errors(
+        sys.modules.get('requests'), sys.modules.get('httpx')
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_transport_errors(requests, httpx):
+    connect, transport, base, read_timeout = (), (), (), ()
+    if requests is not None:
+        connect += (requests.ConnectTimeout,)
+        transport += (requests.ConnectionError, requests.Timeout)
+        base += (requests.RequestException,)
+        read_timeout += (requests.ReadTimeout,)
+    if httpx is not None:
+        connect += (httpx.ConnectError, httpx.ConnectTimeout)
+        transport += (httpx.TransportError,)
+        base += (httpx.HTTPError,)
+        read_timeout += (httpx.ReadTimeout, httpx.WriteTimeout)
+    return TransportErrors(connect, transport, base, read_timeout)
+
+
+def is_idempotent(method, name):
+    r"""
+    Check if request can be safely repeated.
+
+    Search endpoints are read-only even though they use ``POST``.
+
+    :param method: http method of request (required).
+    :param name: relative path of request (required).
+    """
+    return method.lower() in IDEMPOTENT_METHODS or name.endswith('search')
+
+
+class RetryPolicy(object):
+    r"""
+    Retry policy of :class:`recommendpy.RecommendAPI`.
+
+    Idempotent requests (see :func:`is_idempotent`) are retried on
+    connection errors, timeouts and ``statuses``. Other requests are
+    retried only when the api did not process them: ``429`` responses and
+    connect timeouts. Delays grow exponentially with full jitter, a
+    ``Retry-After`` header of the response takes precedence.
+
+    Usage::
+
+        api = RecommendAPI(account_id, retry=RetryPolicy(total=5))
+    """
+
+    def __init__(
+        self, total=3, backoff_factor=0.5, max_backoff=30, jitter=True,
+        statuses=None, max_retry_after=120
+    ):
+        r"""
+        Initialize RetryPolicy object.
+
+        :param total: max count of retries of one request. Defaults to ``3``.
+        :param backoff_factor: delay before the first retry in seconds,
+            doubled for every next retry. Defaults to ``0.5``.
+        :param max_backoff: max delay in seconds. Defaults to ``30``.
+        :param jitter: randomize delays between ``0`` and computed delay.
+            Defaults to ``True``.
+        :param statuses: list of http statuses to retry.
+            Defaults to ``[429, 500, 502, 503, 504]``.
+        :param max_retry_after: max ``Retry-After`` delay in seconds to wait,
+            request is not retried if the api asks to wait longer.
+            Defaults to ``120``.
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = RETRY_STATUSES if statuses is None else statuses
+        self.max_retry_after = max_retry_after
+
+    def is_retryable_status(self, status, idempotent):
+        r"""
+        Check if response status should be retried.
+
+        :param status: http status of response (required).
+        :param idempotent: request can be safely repeated (required).
+        """
+        if status not in self.statuses:
+            return False
+        return idempotent or status == 429
+
+    def is_retryable_error(self, error, idempotent):
+        r"""
+        Check if transport error should be retried.
+
+        :param error: exception raised by transport (required).
+        :param idempotent: request can be safely repeated (required).
+        """
+        errors = get_transport_errors()
+        if isinstance(error, errors.connect):
+            return True
+        return idempotent and isinstance(error, errors.transport)
+
+    def backoff(self, attempt):
+        r"""
+        Return delay before retry.
+
+        :param attempt: number of retry starting from ``1`` (required).
+        """
+        delay = min(
+            self.max_backoff, self.backoff_factor * 2 ** (attempt - 1)
+        )
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+    def retry_after(self, response):
+        r"""
+        Return delay from ``Retry-After`` header of response.
+
+        :param response: response object (required).
+
+        :return: delay in seconds or ``None`` if header is missing.
+        """
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        # http-dates are rare, do not import email package on startup
+        from email.utils import parsedate_to_datetime
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0, retry_at.timestamp() - time.time())
+
+    def get_delay(self, attempt, idempotent, response=None, error=None):
+        r"""
+        Return delay before next retry of failed request.
+
+        :param attempt: number of next retry starting from ``1`` (required).
+        :param idempotent: request can be safely repeated (required).
+        :param response: response object. Defaults to ``None``.
+        :param error: exception raised by transport. Defaults to ``None``.
+
+        :return: delay in seconds or ``None`` if request should not be
+            retried.
+        """
+        if attempt > self.total:
+            return None
+        if error is not None:
+            if not self.is_retryable_error(error, idempotent):
+                return None
+            return self.backoff(attempt)
+        if not self.is_retryable_status(response.status_code, idempotent):
+            return None
+        delay = self.retry_after(response)
+        if delay is None:
+            return self.backoff(attempt)
+        if delay > self.max_retry_after:
+            return None
+        return delay
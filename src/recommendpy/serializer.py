@@ -0,0 +1,107 @@
+import json
+
+from .exceptions import RecommendAPIError
+
+__all__ = [
+    'JSONSerializer',
+    'OrjsonSerializer',
+    'get_serializer',
+]
+
+
+class JSONSerializer(object):
+    """Serializer based on the standard library ``json`` module."""
+
+    name = 'json'
+
+    def dumps(self, data):
+        r"""
+        Serialize data to bytes.
+
+        :param data: data to serialize (required).
+        """
+        return json.dumps(data).encode('utf-8')
+
+    def loads(self, data):
+        r"""
+        Deserialize bytes or str.
+
+        :param data: data to deserialize (required).
+
+        :raises: :class:`json.JSONDecodeError` if data is invalid.
+        """
+        return json.loads(data)
+
+
+class OrjsonSerializer(object):
+    r"""
+    Serializer based on `orjson <https://github.com/ijl/orjson>`_.
+
+    .. note::
+            orjson supports only ``str`` keys of dicts and does not
+            serialize ``Decimal`` objects.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, data):
+        r"""
+        Serialize data to bytes.
+
+        :param data: data to serialize (required).
+        """
+        return self._orjson.dumps(data)
+
+    def loads(self, data):
+        r"""
+        Deserialize bytes or str.
+
+        :param data: data to deserialize (required).
+
+        :raises: :class:`json.JSONDecodeError` if data is invalid.
+        """
+        return self._orjson.loads(data)
+
+
+SERIALIZERS = {
+    'json': JSONSerializer,
+    'orjson': OrjsonSerializer,
+}
+
+
+def get_serializer(serializer=None):
+    r"""
+    Return serializer object.
+
+    :param serializer: name of serializer or object with ``dumps`` method
+        returning bytes and ``loads`` method. One of [None, 'json',
+        'orjson', 'auto'], ``'auto'`` uses orjson if it is installed.
+        Defaults to ``None`` (``'json'``).
+
+    :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+        if incorrect or not installed serializer.
+    """
+    if serializer is None:
+        return JSONSerializer()
+    if not isinstance(serializer, str):
+        if not hasattr(serializer, 'dumps') or \
+                not hasattr(serializer, 'loads'):
+            raise RecommendAPIError('Invalid parameter serializer')
+        return serializer
+    if serializer == 'auto':
+        try:
+            return OrjsonSerializer()
+        except ImportError:
+            return JSONSerializer()
+    if serializer not in SERIALIZERS:
+        raise RecommendAPIError('Invalid parameter serializer')
+    try:
+        return SERIALIZERS[serializer]()
+    except ImportError:
+        raise RecommendAPIError(
+            'Serializer {} is not installed'.format(serializer)
+        )
@@ -0,0 +1,231 @@
+import codecs
+import json
+import re
+
+from .exceptions import RecommendAPIError, RecommendBatchErrorList
+
+import logging
+log = logging.getLogger('recommendpy')
+
+__all__ = [
+    'RecommendResultStream',
+]
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = '.eE+-'
+
+_DATA_START = object()
+
+
+class RecommendResultStream(object):
+    r"""
+    Incremental decoder of api responses.
+
+    Reads the response body from the socket chunk by chunk and yields the
+    items of ``result.data`` one at a time, so the whole response is never
+    held in memory. Other keys of the response are available in
+    :attr:`meta` and other keys of ``result`` (``total``, ``limit``, ...)
+    in :attr:`result` once they have been read.
+
+    ``success``, ``error_message`` and ``batch_error_list`` are checked
+    before the first item when the api sends them before ``result``,
+    otherwise when the end of the response is reached.
+
+    Usage::
+
+        with api.send('post', 'contact/search', {}, stream=True) as items:
+            for item in items:
+                ...
+    """
+
+    def __init__(self, response, chunk_size=STREAM_CHUNK_SIZE):
+        r"""
+        Initialize RecommendResultStream object.
+
+        Reads the response up to the first item of ``result.data``.
+
+        :param response: streamed :class:`requests.Response` (required).
+        :param chunk_size: size of chunks read from the socket.
+            Defaults to ``65536``.
+
+        :raises: :class:`recommendpy.exceptions.RecommendAPIError`
+            if the api reports an error before ``result.data``.
+        """
+        self.response = response
+        self.meta = {}
+        self.result = {}
+        self.count = 0
+
+        self._chunks = response.iter_content(chunk_size)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._parser = self._parse()
+        try:
+            for value in self._parser:
+                if value is _DATA_START:
+                    break
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def success(self):
+        return self.meta.get('success')
+
+    def get(self, key, default=None):
+        r"""
+        Return value of ``result`` key (except ``data``).
+
+        :param key: name of key (required).
+        :param default: default value. Defaults to ``None``.
+        """
+        return self.result.get(key, default)
+
+    def close(self):
+        """Release the connection."""
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._parser)
+        except StopIteration:
+            self.close()
+            raise
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        self._expect('{')
+        for key in self._iter_keys():
+            if key == 'result' and self._peek() == '{':
+                self._pos += 1
+                for result_key in self._iter_keys():
+                    if result_key == 'data' and self._peek() == '[':
+                        self._pos += 1
+                        self._check_errors(partial=True)
+                        yield _DATA_START
+                        for item in self._iter_items():
+                            self.count += 1
+                            yield item
+                    else:
+                        self.result[result_key] = self._value()
+            else:
+                self.meta[key] = self._value()
+        self._check_errors()
+
+    def _check_errors(self, partial=False):
+        data = dict(self.meta, result=self.result)
+        if data.get('batch_error_list'):
+            raise RecommendBatchErrorList(response=self.response, data=data)
+        if data.get('error_message'):
+            raise RecommendAPIError(
+                message=data['error_message'],
+                response=self.response,
+                data=data
+            )
+        if partial or data.get('success'):
+            return
+        raise RecommendAPIError(response=self.response, data=data)
+
+    def _fill(self):
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._decoder.decode(chunk)
+                return
+        self._buf += self._decoder.decode(b'', True)
+        self._eof = True
+
+    def _peek(self):
+        while True:
+            self._pos = WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                return ''
+            self._fill()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise RecommendAPIError(
+                'Invalid JSON in response: expected {!r}.'.format(char),
+                response=self.response,
+                data={}
+            )
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise RecommendAPIError(
+                        'Invalid JSON in response: {}.'.format(e),
+                        response=self.response,
+                        data={}
+                    )
+                self._fill()
+                continue
+            # numbers at the end of the buffer may be cut by the chunk
+            if not self._eof and (
+                end == len(self._buf) or self._buf[end] in NUMBER_TAIL
+            ):
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def _iter_keys(self):
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise RecommendAPIError(
+                    'Invalid JSON in response: expected \',\' or \'}\'.',
+                    response=self.response,
+                    data={}
+                )
+
+    def _iter_items(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise RecommendAPIError(
+                    'Invalid JSON in response: expected \',\' or \']\'.',
+                    response=self.response,
+                    data={}
+                )
@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from recommendpy.backfill import Backfill, SQLiteCheckpoint
+from recommendpy.batch import BatchSizeLimit
+from recommendpy.exceptions import RecommendAPIError, RecommendBatchErrorList
+
+
+class StubResponse(object):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class StubOrderAPI(object):
+    r"""
+    Batch endpoint failing as configured.
+
+    ``item_errors`` are errors of ``batch_error_list`` by record, sent
+    once, ``broken`` records fail the whole batch with ``400`` and batches
+    bigger than ``max_size`` are rejected with ``413``.
+    """
+
+    def __init__(self, item_errors=None, broken=(), max_size=None):
+        self.item_errors = dict(item_errors or {})
+        self.broken = set(broken)
+        self.max_size = max_size
+        self.batches = []
+        self.accepted = []
+
+    def send(self, records):
+        self.batches.append(list(records))
+        if self.max_size is not None and len(records) > self.max_size:
+            raise RecommendAPIError(response=StubResponse(413), data={})
+        if self.broken.intersection(records):
+            raise RecommendAPIError(response=StubResponse(400), data={})
+        errors = []
+        for index, record in enumerate(records):
+            error = self.item_errors.pop(record, None)
+            if error is None:
+                self.accepted.append(record)
+            else:
+                error = dict({'index': index}, **error)
+                errors.append({
+                    name: value for name, value in error.items()
+                    if value is not None
+                })
+        if errors:
+            raise RecommendBatchErrorList(data={'batch_error_list': errors})
+        return True
+
+
+class CheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'checkpoint.sqlite')
+        self.checkpoint = SQLiteCheckpoint(self.path)
+
+    def tearDown(self):
+        self.checkpoint.close()
+        shutil.rmtree(self.directory)
+
+    def test_merge(self):
+        """ranges are merged when they meet or overlap."""
+        checkpoint = self.checkpoint
+        checkpoint.commit(10, 20)
+        checkpoint.commit(30, 40)
+        self.assertEqual(checkpoint.ranges, [(10, 20), (30, 40)])
+        self.assertEqual(checkpoint.offset, 0)
+        checkpoint.commit(0, 10)
+        self.assertEqual(checkpoint.ranges, [(0, 20), (30, 40)])
+        self.assertEqual(checkpoint.offset, 20)
+        checkpoint.commit(50, 60)
+        checkpoint.commit(15, 55)
+        self.assertEqual(checkpoint.ranges, [(0, 60)])
+        self.assertEqual(checkpoint.offset, 60)
+        self.assertEqual(checkpoint.committed, 60)
+        checkpoint.commit(5, 8)
+        self.assertEqual(checkpoint.ranges, [(0, 60)])
+
+    def test_persistence(self):
+        """ranges are read on open, names are separate."""
+        self.checkpoint.commit(0, 5)
+        self.checkpoint.commit(7, 9)
+        other = SQLiteCheckpoint(self.path, name='other')
+        other.commit(100, 200)
+        other.close()
+        self.checkpoint.close()
+        self.checkpoint = SQLiteCheckpoint(self.path)
+        self.assertEqual(self.checkpoint.ranges, [(0, 5), (7, 9)])
+        self.checkpoint.commit(5, 7)
+        self.checkpoint.close()
+        self.checkpoint = SQLiteCheckpoint(self.path)
+        self.assertEqual(self.checkpoint.ranges, [(0, 9)])
+        self.checkpoint.reset()
+        self.assertEqual(SQLiteCheckpoint(self.path).ranges, [])
+        self.assertEqual(
+            SQLiteCheckpoint(self.path, name='other').ranges, [(100, 200)]
+        )
+
+    def test_resume(self):
+        """committed records are skipped by the next run."""
+        self.checkpoint.commit(0, 12)
+        self.checkpoint.commit(20, 25)
+        sent = []
+        backfill = Backfill(
+            lambda records: sent.extend(records) or True, self.checkpoint,
+            chunk_size=4, concurrency=1
+        )
+        report = backfill.run(iter(range(30)))
+        self.assertTrue(report.ok)
+        self.assertEqual(sent, list(range(12, 20)) + list(range(25, 30)))
+        self.assertEqual(backfill.skipped, 17)
+        self.assertEqual(self.checkpoint.ranges, [(0, 30)])
+
+
+class BackfillTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = SQLiteCheckpoint(
+            os.path.join(self.directory, 'checkpoint.sqlite')
+        )
+
+    def tearDown(self):
+        self.checkpoint.close()
+        shutil.rmtree(self.directory)
+
+    def run_backfill(self, api, records=30, **kw):
+        kw.setdefault('chunk_size', 5)
+        backfill = Backfill(
+            api.send, self.checkpoint, concurrency=1, **kw
+        )
+        return backfill.run(iter(range(records)))
+
+    def test_transient_item_errors(self):
+        """items failed with transient errors are not committed."""
+        api = StubOrderAPI({7: {'code': 503}, 12: {'code': 503}})
+        report = self.run_backfill(api)
+        self.assertFalse(report.ok)
+        self.assertEqual(
+            self.checkpoint.ranges, [(0, 7), (8, 12), (13, 30)]
+        )
+        api = StubOrderAPI()
+        self.assertTrue(self.run_backfill(api).ok)
+        self.assertEqual(api.batches, [[7], [12]])
+        self.assertEqual(self.checkpoint.ranges, [(0, 30)])
+
+    def test_retry_item_errors(self):
+        """retries send failed items only."""
+        api = StubOrderAPI({7: {'code': 503}, 8: {'code': 400}})
+        report = self.run_backfill(api, retries=2)
+        self.assertFalse(report.ok)
+        self.assertEqual(len(report.permanent_errors), 1)
+        self.assertEqual(api.batches[-1], [7])
+        self.assertEqual(sorted(api.accepted), [
+            record for record in range(30) if record != 8
+        ])
+        self.assertEqual(self.checkpoint.ranges, [(0, 30)])
+
+    def test_unmapped_item_errors(self):
+        """chunk with transient errors not matched is not committed."""
+        api = StubOrderAPI({7: {'code': 503, 'index': None}})
+        self.run_backfill(api, retries=2)
+        self.assertEqual(len(api.batches), 6)
+        self.assertEqual(self.checkpoint.ranges, [(0, 5), (10, 30)])
+
+    def test_split_failure(self):
+        """accepted parts of split chunk are committed."""
+        api = StubOrderAPI(broken=[16], max_size=4)
+        report = self.run_backfill(
+            api, chunk_size=10, limit=BatchSizeLimit(), min_size=2
+        )
+        self.assertFalse(report.ok)
+        self.assertEqual(self.checkpoint.ranges, [(0, 16), (20, 30)])
+        api = StubOrderAPI()
+        self.run_backfill(api, chunk_size=10)
+        self.assertEqual(api.batches, [[16, 17, 18, 19]])
+        self.assertEqual(self.checkpoint.ranges, [(0, 30)])
+
+
+def suite():
+    loader = unittest.defaultTestLoader
+    return unittest.TestSuite([
+        loader.loadTestsFromTestCase(CheckpointTestCase),
+        loader.loadTestsFromTestCase(BackfillTestCase),
+    ])
@@ -1,14 +1,105 @@
 from datetime import datetime
 
+import json
+import time
 import unittest
 
 from recommendpy.exceptions import RecommendNotFoundError, RecommendAPIError
+from recommendpy.token import RecommendAPIToken
+
+STUB_API_URL = 'https://api.recommend.test/v3'
+STUB_ACCOUNT = 'account'
 
 
 def get_identifier():
     return 'test-{}'.format(datetime.utcnow().timestamp())
 
 
+class StubResponse(object):
+    """Response of :class:`StubSession`."""
+
+    def __init__(self, status_code=200, data=None, headers=None, size=None):
+        r"""
+        Initialize StubResponse object.
+
+        :param status_code: http status. Defaults to ``200``.
+        :param data: decoded body. Defaults to ``None``.
+        :param headers: dict of headers. Defaults to ``None``.
+        :param size: size of chunks of streamed body.
+            Defaults to ``None`` (whole body).
+        """
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode('utf-8')
+        self.size = size
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size):
+        size = self.size or chunk_size
+        for start in range(0, len(self.content), size):
+            yield self.content[start:start + size]
+
+    def close(self):
+        self.closed = True
+
+
+class StubSession(object):
+    r"""
+    Session of :class:`recommendpy.RecommendAPI` without network.
+
+    Requests are passed to ``handler`` as method, relative path and
+    keyword arguments, it returns :class:`StubResponse` or raises
+    a transport error.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.closed = False
+
+    def request(self, method, url, **kw):
+        name = url[len('{}/{}/'.format(STUB_API_URL, STUB_ACCOUNT)):]
+        self.requests.append((method, name, kw))
+        return self.handler(method, name, kw)
+
+    def get(self, url, **kw):
+        return self.request('get', url, **kw)
+
+    def post(self, url, **kw):
+        return self.request('post', url, **kw)
+
+    def put(self, url, **kw):
+        return self.request('put', url, **kw)
+
+    def delete(self, url, **kw):
+        return self.request('delete', url, **kw)
+
+    def close(self):
+        self.closed = True
+
+
+def get_stub_api(handler, **kwargs):
+    r"""
+    Return client which sends requests to ``handler``.
+
+    :param handler: function called with method, relative path and
+        keyword arguments of request (required).
+    :param \**kwargs: keyword arguments of
+        :class:`recommendpy.RecommendAPI`.
+    """
+    from recommendpy import RecommendAPI
+
+    api = RecommendAPI(
+        STUB_ACCOUNT, api_url=STUB_API_URL,
+        auth_token=RecommendAPIToken('token', time.time() + 3600), **kwargs
+    )
+    api._session = StubSession(handler)
+    return api
+
+
 class BaseTestCase(unittest.TestCase):
     def __init__(self, namespace, *args, **kwargs):
         self.api_namespace = namespace
@@ -0,0 +1,139 @@
+import unittest
+
+from recommendpy.batch import BatchSizeLimit, run_batches
+from recommendpy.exceptions import RecommendAPIError
+
+
+class StubResponse(object):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class StubBatchAPI(object):
+    """Batch endpoint which rejects batches bigger than ``max_size``."""
+
+    def __init__(self, max_size, status_code=413):
+        self.max_size = max_size
+        self.status_code = status_code
+        self.sizes = []
+        self.accepted = []
+
+    def send(self, records):
+        self.sizes.append(len(records))
+        if len(records) > self.max_size:
+            raise RecommendAPIError(
+                response=StubResponse(self.status_code), data={}
+            )
+        self.accepted += records
+        return True
+
+
+class BatchSizeLimitTestCase(unittest.TestCase):
+    def test_unlimited(self):
+        """no limit before a batch is rejected."""
+        limit = BatchSizeLimit()
+        limit.succeeded(5000)
+        self.assertIsNone(limit.size)
+
+    def test_rejected(self):
+        """half of rejected size until a smaller batch is accepted."""
+        limit = BatchSizeLimit()
+        limit.failed(1000)
+        self.assertEqual(limit.size, 500)
+        limit.succeeded(300)
+        self.assertEqual(limit.size, 300)
+        limit.failed(900)
+        self.assertEqual(limit.size, 300)
+        limit.succeeded(700)
+        self.assertEqual(limit.size, 700)
+        limit.succeeded(1000)
+        self.assertEqual(limit.size, 700)
+
+    def test_smaller_rejected(self):
+        """rejection below the accepted size resets it."""
+        limit = BatchSizeLimit()
+        limit.failed(1000)
+        limit.succeeded(800)
+        limit.failed(600)
+        self.assertEqual(limit.size, 300)
+        limit.failed(1)
+        self.assertEqual(limit.size, 1)
+
+
+class BisectTestCase(unittest.TestCase):
+    def test_bisect(self):
+        """rejected chunks are split and the limit is reused."""
+        api = StubBatchAPI(300)
+        limit = BatchSizeLimit()
+        records = list(range(3000))
+        report = run_batches(
+            api.send, [(records[:1000], 0), (records[1000:], 0)],
+            concurrency=1, limit=limit
+        )
+        self.assertTrue(report.ok)
+        self.assertEqual(sorted(api.accepted), records)
+        self.assertEqual(api.sizes[:4], [1000, 500, 250, 250])
+        self.assertEqual(limit.size, 250)
+        # the second chunk is split by the limit before sending
+        self.assertEqual(api.sizes[-8:], [250] * 8)
+
+    def test_min_size(self):
+        """splitting stops at min_size, not accepted records are kept."""
+        api = StubBatchAPI(5, status_code=504)
+        report = run_batches(
+            api.send, [(list(range(40)), 0)], concurrency=1,
+            limit=BatchSizeLimit(), min_size=10
+        )
+        self.assertFalse(report.ok)
+        self.assertEqual(api.sizes, [40, 20, 10])
+        self.assertEqual(report.chunks[0].records, list(range(40)))
+
+    def test_other_errors(self):
+        """errors not caused by size are not split."""
+        api = StubBatchAPI(5, status_code=400)
+        report = run_batches(
+            api.send, [(list(range(40)), 0)], concurrency=1,
+            limit=BatchSizeLimit()
+        )
+        self.assertFalse(report.ok)
+        self.assertEqual(api.sizes, [40])
+
+    def test_retry_rest(self):
+        """retry sends the records not accepted before."""
+        api = StubBatchAPI(10, status_code=413)
+        report = run_batches(
+            api.send, [(list(range(40)), 0)], concurrency=1,
+            limit=BatchSizeLimit(), min_size=10
+        )
+        self.assertTrue(report.ok)
+        self.assertEqual(sorted(api.accepted), list(range(40)))
+
+    def test_retry_split_failure(self):
+        """retry does not send accepted parts of failed chunk."""
+        api = StubBatchAPI(10, status_code=413)
+        failed = []
+
+        def send(records):
+            if len(records) <= api.max_size and 25 in records and not failed:
+                failed.append(records)
+                raise RecommendAPIError(response=StubResponse(400), data={})
+            return api.send(records)
+
+        report = run_batches(
+            send, [(list(range(40)), 0)], concurrency=1,
+            limit=BatchSizeLimit(), min_size=10
+        )
+        self.assertFalse(report.ok)
+        self.assertEqual(report.chunks[0].accepted, [(0, 10), (10, 20)])
+        self.assertEqual(report.chunks[0].retry_records, list(range(20, 40)))
+        report.retry()
+        self.assertTrue(report.ok)
+        self.assertEqual(sorted(api.accepted), list(range(40)))
+
+
+def suite():
+    loader = unittest.defaultTestLoader
+    return unittest.TestSuite([
+        loader.loadTestsFromTestCase(BatchSizeLimitTestCase),
+        loader.loadTestsFromTestCase(BisectTestCase),
+    ])
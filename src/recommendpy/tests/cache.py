@@ -0,0 +1,132 @@
+import unittest
+from unittest import mock
+
+from recommendpy.cache import ResponseCache
+
+from .base import StubResponse, get_stub_api
+
+
+class Clock(object):
+    """Replacement of ``time`` module of cache."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('recommendpy.cache.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ttl(self):
+        """entries expire after TTL of the longest matching prefix."""
+        cache = ResponseCache(
+            ttl=60, ttls={'attribute': 600, 'attribute/contact': 0}
+        )
+        cache.set(('store', ''), 'stores')
+        cache.set(('attribute/product', ''), 'product')
+        cache.set(('attribute/contact', ''), 'contact')
+        self.assertIsNone(cache.get(('attribute/contact', '')))
+        self.assertTrue(cache.get(('store', '')).is_fresh)
+        self.clock.now += 61
+        entry = cache.get(('store', ''))
+        self.assertEqual(entry.value, 'stores')
+        self.assertFalse(entry.is_fresh)
+        self.assertTrue(cache.get(('attribute/product', '')).is_fresh)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_lru(self):
+        """least recently used entries are evicted."""
+        cache = ResponseCache(maxsize=2)
+        cache.set(('a', ''), 1)
+        cache.set(('b', ''), 2)
+        cache.get(('a', ''))
+        cache.set(('c', ''), 3)
+        self.assertIsNone(cache.get(('b', '')))
+        self.assertEqual(cache.get(('a', '')).value, 1)
+        cache.set(('d', ''), 4)
+        self.assertIsNone(cache.get(('c', '')))
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate(self):
+        """endpoint and its sub-paths are invalidated."""
+        cache = ResponseCache()
+        for name in ['store', 'store/s1', 'store/s1/x', 'stores', 'config']:
+            cache.set(cache.make_key(name), name)
+        cache.set(cache.make_key('store', {'b': 2, 'a': 1}), 'params')
+        self.assertEqual(
+            cache.make_key('store', {'a': 1, 'b': 2}),
+            cache.make_key('store', {'b': 2, 'a': 1})
+        )
+        cache.invalidate('store/s1')
+        self.assertEqual(len(cache), 4)
+        cache.invalidate('store')
+        self.assertEqual(
+            sorted(key[0] for key in cache._entries), ['config', 'stores']
+        )
+
+    def make_api(self, responses):
+        def handler(method, name, args):
+            self.requests.append((method, name, args.get('headers')))
+            return responses.pop(0)
+
+        self.requests = []
+        return get_stub_api(handler, cache=ResponseCache(ttl=60))
+
+    def test_revalidate(self):
+        """expired result is revalidated with its ETag."""
+        data = {'success': True, 'result': [{'code': 's1'}]}
+        api = self.make_api([
+            StubResponse(data=data, headers={'ETag': '"v1"'}),
+            StubResponse(304),
+            StubResponse(data=data, headers={'ETag': '"v2"'}),
+        ])
+        self.assertEqual(api.store.list(), [{'code': 's1'}])
+        self.assertEqual(api.store.list(), [{'code': 's1'}])
+        self.assertEqual(len(self.requests), 1)
+        self.clock.now += 61
+        self.assertEqual(api.store.list(), [{'code': 's1'}])
+        self.assertEqual(self.requests[1][2]['If-None-Match'], '"v1"')
+        # revalidated result is fresh again
+        self.assertEqual(api.store.list(), [{'code': 's1'}])
+        self.assertEqual(len(self.requests), 2)
+        self.clock.now += 61
+        api.store.list()
+        self.assertEqual(self.requests[2][2]['If-None-Match'], '"v1"')
+        self.assertEqual(
+            api.cache.get(api.cache.make_key('store')).etag, '"v2"'
+        )
+
+    def test_send_invalidating(self):
+        """changes through the client invalidate cached results."""
+        data = {'success': True, 'result': {'code': 's1'}}
+        api = self.make_api([
+            StubResponse(data=data),
+            StubResponse(data=data),
+            StubResponse(data={'success': True}),
+            StubResponse(data=data),
+            StubResponse(data=data),
+        ])
+        api.store.list()
+        api.store.get('s1')
+        api.store.list()
+        api.store.get('s1')
+        self.assertEqual(len(self.requests), 2)
+        api.store.update('s1', {'name': 'x'})
+        api.store.list()
+        api.store.get('s1')
+        self.assertEqual(
+            [request[:2] for request in self.requests], [
+                ('get', 'store'), ('get', 'store/s1'), ('put', 'store/s1'),
+                ('get', 'store'), ('get', 'store/s1'),
+            ]
+        )
+
+
+def suite():
+    return unittest.defaultTestLoader.loadTestsFromTestCase(CacheTestCase)
@@ -40,8 +40,32 @@ class ContactListTestCase(BaseTestCase):
         self.api_namespace.delete(self._id)
 
 
+class ContactListBulkTestCase(BaseTestCase):
+    def setUp(self):
+        self._id = get_identifier()
+        self.data = self.api_namespace._test_data
+        self.api_namespace.create(self._id, self.data)
+
+    def runTest(self):  # NOQA
+        """bulk attach, bulk detach by email."""
+        test_emails = ['test@recommend.pro', 'test2@recommend.pro']
+        report = self.api_namespace.bulk_attach(
+            self._id, emails=test_emails, chunk_size=1
+        )
+        self.assertTrue(report.ok)
+        self.assertEqual(len(report.chunks), 2)
+        report = self.api_namespace.bulk_detach(
+            self._id, emails=test_emails, chunk_size=1
+        )
+        self.assertTrue(report.ok)
+
+    def tearDown(self):
+        self.api_namespace.delete(self._id)
+
+
 def suite(api):
     namespace = api.contact.list
     suite = get_suite(namespace)
     suite.addTest(ContactListTestCase(namespace))
+    suite.addTest(ContactListBulkTestCase(namespace))
     return suite
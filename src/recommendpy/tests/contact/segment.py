@@ -39,8 +39,68 @@ class ContactSegmentTestCase(BaseTestCase):
         self.api_namespace.delete(self._id)
 
 
+class ContactSegmentSyncTestCase(BaseTestCase):
+    def setUp(self):
+        self._id = get_identifier()
+        self.data = self.api_namespace._test_data
+        self.api_namespace.create(self._id, self.data)
+        self.api_namespace.attach(
+            identifier=self._id, field='email',
+            identifiers=['test@recommend.pro', 'test2@recommend.pro']
+        )
+
+    def runTest(self):  # NOQA
+        """sync members by email."""
+        test_emails = ['test2@recommend.pro', 'test3@recommend.pro']
+        report = self.api_namespace.sync(
+            self._id, 'email', test_emails, chunk_size=1
+        )
+        self.assertTrue(report.ok)
+        self.assertEqual(report.attached.records, 1)
+        self.assertEqual(report.detached.records, 1)
+        self.assertEqual(
+            sorted(self.api_namespace.search_iterator(
+                identifier=self._id, field='email'
+            )),
+            test_emails
+        )
+
+    def tearDown(self):
+        self.api_namespace.delete(self._id)
+
+
+class ContactSegmentCursorTestCase(BaseTestCase):
+    def setUp(self):
+        self._id = get_identifier()
+        self.data = self.api_namespace._test_data
+        self.api_namespace.create(self._id, self.data)
+        self.api_namespace.attach(
+            identifier=self._id, field='email',
+            identifiers=['test@recommend.pro', 'test2@recommend.pro']
+        )
+
+    def runTest(self):  # NOQA
+        """resume search_iterator from saved cursor."""
+        iterator = self.api_namespace.search_iterator(
+            identifier=self._id, field='email'
+        )
+        first = next(iterator)
+        cursor = iterator.cursor.dumps()
+        iterator.close()
+        rest = list(self.api_namespace.search_iterator(cursor=cursor))
+        self.assertEqual(
+            sorted([first] + rest),
+            ['test2@recommend.pro', 'test@recommend.pro']
+        )
+
+    def tearDown(self):
+        self.api_namespace.delete(self._id)
+
+
 def suite(api):
     namespace = api.contact.segment
     suite = get_suite(namespace)
     suite.addTest(ContactSegmentTestCase(namespace))
+    suite.addTest(ContactSegmentSyncTestCase(namespace))
+    suite.addTest(ContactSegmentCursorTestCase(namespace))
     return suite
@@ -0,0 +1,88 @@
+import unittest
+
+from recommendpy.cursor import SearchCursor
+
+from .base import StubResponse, get_stub_api
+
+ITEMS = [{'customer_id': 'c{}'.format(index)} for index in range(40)]
+PAGE_SIZE = 7
+STOPS = [0, 1, 6, 7, 8, 20, 34, 35, 39, 40]
+MODES = [
+    {'concurrency': 1, 'stream': False},
+    {'concurrency': 3, 'stream': False},
+    {'concurrency': 1, 'stream': True},
+    {'concurrency': 3, 'stream': True},
+]
+
+
+class CursorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.items = list(ITEMS)
+        self.skips = []
+        self.api = get_stub_api(self.search)
+
+    def search(self, method, name, args):
+        # the api uses its own page size whatever limit is requested
+        skip = (args.get('params') or {}).get('skip', 0)
+        self.skips.append(skip)
+        data = {
+            'success': True,
+            'result': {
+                'data': self.items[skip:skip + PAGE_SIZE],
+                'total': len(self.items),
+                'limit': PAGE_SIZE,
+            },
+        }
+        return StubResponse(data=data, size=5 if args.get('stream') else None)
+
+    def test_resume(self):
+        """resumed iterator yields the rest without duplicates."""
+        for mode in MODES:
+            for stop in STOPS:
+                with self.subTest(stop=stop, **mode):
+                    iterator = self.api.contact.search_iterator(**mode)
+                    head = [next(iterator) for _ in range(stop)]
+                    saved = iterator.cursor.dumps()
+                    iterator.close()
+                    cursor = SearchCursor.loads(saved)
+                    self.assertEqual(cursor.offset, stop)
+                    self.skips = []
+                    with self.assertNoLogs('recommendpy', 'WARNING'):
+                        tail = list(self.api.contact.search_iterator(
+                            cursor=saved, **mode
+                        ))
+                    self.assertEqual(head + tail, ITEMS)
+                    # only the page of cursor is requested again
+                    self.assertEqual(
+                        sorted(self.skips),
+                        list(range(cursor.skip, len(ITEMS), PAGE_SIZE))
+                    )
+
+    def test_finished(self):
+        """cursor of finished iterator yields nothing."""
+        iterator = self.api.contact.search_iterator()
+        self.assertEqual(list(iterator), ITEMS)
+        self.assertTrue(iterator.cursor.done)
+        self.skips = []
+        self.assertEqual(
+            list(self.api.contact.search_iterator(cursor=iterator.cursor)),
+            []
+        )
+        self.assertEqual(self.skips, [])
+
+    def test_changed(self):
+        """changed results of resumed page are logged."""
+        iterator = self.api.contact.search_iterator()
+        head = [next(iterator) for _ in range(10)]
+        cursor = iterator.cursor.to_dict()
+        iterator.close()
+        self.assertEqual(head[-1], {'customer_id': 'c9'})
+        del self.items[3]
+        with self.assertLogs('recommendpy', 'WARNING') as logs:
+            tail = list(self.api.contact.search_iterator(cursor=cursor))
+        self.assertIn("is 'c10', expected 'c9'", logs.output[0])
+        self.assertEqual(tail, ITEMS[11:])
+
+
+def suite():
+    return unittest.defaultTestLoader.loadTestsFromTestCase(CursorTestCase)
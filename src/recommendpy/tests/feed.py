@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from recommendpy.feed import CSVFeed, JSONLFeed
+
+RANGE_SIZES = [1, 2, 3, 5, 8, 13, 21, 64, 1024 * 1024]
+
+ROWS = [
+    {'code': 'p1', 'name': 'plain', 'description': 'one line'},
+    {'code': 'p2', 'name': 'comma, inside', 'description': 'a\nb'},
+    {'code': 'p3', 'name': 'quote "x"', 'description': '\n\nline\n"q"\n'},
+    {'code': 'p4', 'name': '', 'description': 'Тарас 🍏\r\nnext'},
+    {'code': 'p5', 'name': '"', 'description': '""\n""'},
+    {'code': 'p6', 'name': 'last', 'description': 'end'},
+]
+
+
+class FeedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def write_csv(self, rows, **fmtparams):
+        text = io.StringIO(newline='')
+        writer = csv.DictWriter(text, list(rows[0]), **fmtparams)
+        writer.writeheader()
+        writer.writerows(rows)
+        return self.write('feed.csv', text.getvalue().encode('utf-8'))
+
+    def test_csv_quoted_newlines(self):
+        """quoted newlines split by ranges stay in their records."""
+        for lineterminator in ['\r\n', '\n']:
+            path = self.write_csv(ROWS * 3, lineterminator=lineterminator)
+            for size in RANGE_SIZES:
+                with self.subTest(size=size, lineterminator=lineterminator):
+                    feed = CSVFeed(path, range_bytes=size)
+                    self.assertEqual(list(feed), ROWS * 3)
+                    ranges = list(feed.ranges())
+                    self.assertEqual(
+                        [start for start, end in ranges[1:]],
+                        [end for start, end in ranges[:-1]]
+                    )
+
+    def test_csv_processes(self):
+        """records parsed by worker processes are in file order."""
+        path = self.write_csv(ROWS * 20)
+        for size in [7, 64, 1024 * 1024]:
+            with self.subTest(size=size):
+                feed = CSVFeed(path, range_bytes=size, processes=2)
+                self.assertEqual(list(feed), ROWS * 20)
+
+    def test_csv_header(self):
+        """header with BOM, fieldnames and converter."""
+        path = self.write(
+            'feed.csv', '\ufeffcode,name\n1,"a\nb"\n2,c'.encode('utf-8')
+        )
+        for size in RANGE_SIZES:
+            with self.subTest(size=size):
+                self.assertEqual(list(CSVFeed(path, range_bytes=size)), [
+                    {'code': '1', 'name': 'a\nb'},
+                    {'code': '2', 'name': 'c'},
+                ])
+        path = self.write('rows.csv', b'1;"x;\ny"\n2;z\n')
+        feed = CSVFeed(
+            path, range_bytes=3, fieldnames=['code', 'name'],
+            converter=dict, delimiter=';'
+        )
+        self.assertEqual(list(feed), [
+            {'code': '1', 'name': 'x;\ny'}, {'code': '2', 'name': 'z'},
+        ])
+
+    def test_jsonl(self):
+        """lines are not split by ranges."""
+        records = [dict(row, n=index) for index, row in enumerate(ROWS * 5)]
+        data = '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records
+        )
+        path = self.write('feed.jsonl', (data + '\n\n').encode('utf-8'))
+        for size in RANGE_SIZES:
+            with self.subTest(size=size):
+                self.assertEqual(
+                    list(JSONLFeed(path, range_bytes=size)), records
+                )
+        feed = JSONLFeed(path, range_bytes=50, processes=2)
+        self.assertEqual(list(feed), records)
+
+    def test_empty(self):
+        self.assertEqual(list(CSVFeed(self.write('empty.csv', b''))), [])
+        self.assertEqual(list(JSONLFeed(self.write('empty.jsonl', b''))), [])
+
+
+def suite():
+    return unittest.defaultTestLoader.loadTestsFromTestCase(FeedTestCase)
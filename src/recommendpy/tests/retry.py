@@ -0,0 +1,151 @@
+import random
+import time
+import unittest
+from email.utils import formatdate
+
+import requests
+
+from recommendpy.exceptions import RecommendAPIError
+from recommendpy.retry import RetryPolicy, is_idempotent
+
+from .base import StubResponse, get_stub_api
+
+OK = {'success': True, 'result': {'ok': 1}}
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_backoff(self):
+        """delays grow exponentially up to max_backoff."""
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=30, jitter=False)
+        self.assertEqual(
+            [policy.backoff(attempt) for attempt in range(1, 10)],
+            [0.5, 1, 2, 4, 8, 16, 30, 30, 30]
+        )
+
+    def test_jitter(self):
+        """jittered delays are between 0 and the delay."""
+        random.seed(1)
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=30)
+        for attempt in range(1, 10):
+            limit = min(30, 0.5 * 2 ** (attempt - 1))
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            self.assertTrue(all(0 <= delay <= limit for delay in delays))
+            self.assertGreater(max(delays), limit / 2)
+
+    def test_retry_after_seconds(self):
+        """Retry-After in seconds."""
+        policy = RetryPolicy()
+        for value, delay in [
+            ('7', 7), ('0.5', 0.5), ('-3', 0), ('', None), ('soon', None)
+        ]:
+            with self.subTest(value=value):
+                response = StubResponse(503, headers={'Retry-After': value})
+                self.assertEqual(policy.retry_after(response), delay)
+        self.assertIsNone(policy.retry_after(StubResponse(503)))
+
+    def test_retry_after_date(self):
+        """Retry-After as HTTP-date."""
+        policy = RetryPolicy()
+        response = StubResponse(
+            503, headers={'Retry-After': formatdate(time.time() + 60)}
+        )
+        self.assertTrue(58 <= policy.retry_after(response) <= 60)
+        response = StubResponse(
+            503, headers={'Retry-After': formatdate(time.time() - 60)}
+        )
+        self.assertEqual(policy.retry_after(response), 0)
+
+    def test_statuses(self):
+        """only 429 is retried for requests which are not idempotent."""
+        policy = RetryPolicy(total=2, jitter=False)
+        response = StubResponse(503)
+        self.assertEqual(policy.get_delay(1, True, response), 0.5)
+        self.assertEqual(policy.get_delay(2, True, response), 1)
+        self.assertIsNone(policy.get_delay(3, True, response))
+        self.assertIsNone(policy.get_delay(1, False, response))
+        self.assertIsNone(policy.get_delay(1, True, StubResponse(400)))
+        response = StubResponse(429, headers={'Retry-After': '3'})
+        self.assertEqual(policy.get_delay(1, False, response), 3)
+        response = StubResponse(429, headers={'Retry-After': '600'})
+        self.assertIsNone(policy.get_delay(1, False, response))
+
+    def test_errors(self):
+        """requests which are not idempotent are retried on connect only."""
+        policy = RetryPolicy(jitter=False)
+        for error, idempotent, retried in [
+            (requests.ConnectTimeout(), False, True),
+            (requests.ConnectionError(), False, False),
+            (requests.ReadTimeout(), False, False),
+            (requests.ConnectionError(), True, True),
+            (requests.ReadTimeout(), True, True),
+            (ValueError(), True, False),
+        ]:
+            with self.subTest(error=error, idempotent=idempotent):
+                self.assertEqual(
+                    policy.get_delay(1, idempotent, error=error) is not None,
+                    retried
+                )
+
+    def test_is_idempotent(self):
+        self.assertTrue(is_idempotent('GET', 'store'))
+        self.assertTrue(is_idempotent('delete', 'contact/c1'))
+        self.assertTrue(is_idempotent('post', 'contact/search'))
+        self.assertFalse(is_idempotent('post', 'order/batch'))
+
+
+class ClientRetryTestCase(unittest.TestCase):
+    def make_api(self, responses, **kw):
+        responses = list(responses)
+
+        def handler(method, name, args):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        policy = RetryPolicy(backoff_factor=0, jitter=False, **kw)
+        return get_stub_api(handler, retry=policy)
+
+    def test_retry_search(self):
+        """idempotent request is retried after errors."""
+        api = self.make_api([
+            requests.ConnectionError(), StubResponse(503), StubResponse(
+                429, headers={'Retry-After': '0'}
+            ), StubResponse(data=OK),
+        ])
+        self.assertEqual(api.send('post', 'contact/search', {}), {'ok': 1})
+        self.assertEqual(len(api._session.requests), 4)
+        self.assertEqual(api.retries, 3)
+
+    def test_post_connection_error(self):
+        """post is not retried when the api could get it."""
+        api = self.make_api([requests.ConnectionError()])
+        with self.assertRaises(requests.ConnectionError):
+            api.send('post', 'order/batch', [{'id': 1}])
+        api = self.make_api([StubResponse(503, data={})])
+        with self.assertRaises(RecommendAPIError):
+            api.send('post', 'order/batch', [{'id': 1}])
+        self.assertEqual(api.retries, 0)
+
+    def test_post_connect_timeout(self):
+        """post is retried when it did not reach the api."""
+        api = self.make_api([
+            requests.ConnectTimeout(), StubResponse(data=OK)
+        ])
+        self.assertEqual(api.send('post', 'order/batch', []), {'ok': 1})
+        self.assertEqual(api.retries, 1)
+
+    def test_total(self):
+        """request fails after total retries."""
+        api = self.make_api([StubResponse(503, data={})] * 3, total=2)
+        with self.assertRaises(RecommendAPIError):
+            api.send('get', 'store')
+        self.assertEqual(len(api._session.requests), 3)
+
+
+def suite():
+    loader = unittest.defaultTestLoader
+    return unittest.TestSuite([
+        loader.loadTestsFromTestCase(RetryPolicyTestCase),
+        loader.loadTestsFromTestCase(ClientRetryTestCase),
+    ])
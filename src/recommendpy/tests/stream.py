@@ -0,0 +1,143 @@
+import json
+import unittest
+
+from recommendpy.exceptions import RecommendAPIError, RecommendBatchErrorList
+from recommendpy.stream import RecommendResultStream
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 65536]
+
+ITEMS = [
+    {'customer_id': 'c1', 'email': 'a@recommend.pro', 'total': 1.5e10},
+    {'customer_id': 'c2', 'name': 'Тарас 🍏', 'n': -123456789},
+    {'customer_id': 'c3', 'tags': ['x', 'y'], 'price': 0.125, 'ok': True},
+    12345678901234567890,
+    'plain',
+    None,
+]
+
+
+class StubResponse(object):
+    """Response which returns its body in chunks of fixed size."""
+
+    status_code = 200
+
+    def __init__(self, body, size):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.size = size
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.size):
+            yield self.body[start:start + self.size]
+
+    def close(self):
+        self.closed = True
+
+
+def make_stream(data, size):
+    body = data if isinstance(data, str) else json.dumps(
+        data, ensure_ascii=False, indent=1
+    )
+    response = StubResponse(body, size)
+    return RecommendResultStream(response), response
+
+
+class ResultStreamTestCase(unittest.TestCase):
+    def test_items(self):
+        """decode items split at any byte."""
+        data = {
+            'success': True,
+            'result': {'total': 6, 'data': ITEMS, 'limit': 3000},
+        }
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                stream, response = make_stream(data, size)
+                self.assertEqual(list(stream), ITEMS)
+                self.assertEqual(stream.count, len(ITEMS))
+                self.assertEqual(stream.get('total'), 6)
+                self.assertEqual(stream.get('limit'), 3000)
+                self.assertTrue(response.closed)
+
+    def test_keys_after_data(self):
+        """read success and meta keys sent after result."""
+        body = (
+            '{"result": {"data": [1, 2.5, -3e2], "skip": 0},'
+            ' "success": true, "request_id": "r1"}'
+        )
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                stream, _ = make_stream(body, size)
+                self.assertEqual(list(stream), [1, 2.5, -300.0])
+                self.assertEqual(stream.get('skip'), 0)
+                self.assertEqual(stream.meta['request_id'], 'r1')
+
+    def test_empty_data(self):
+        """empty data and whitespace."""
+        body = ' { "success" : true , "result" : { "data" : [ ] } } '
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                stream, _ = make_stream(body, size)
+                self.assertEqual(list(stream), [])
+                self.assertEqual(stream.count, 0)
+
+    def test_error_before_data(self):
+        """error sent before result is raised before the first item."""
+        body = '{"success": false, "error_message": "bad", "result": {}}'
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                response = StubResponse(body, size)
+                with self.assertRaises(RecommendAPIError) as cm:
+                    RecommendResultStream(response)
+                self.assertEqual(cm.exception.message, 'bad')
+                self.assertTrue(response.closed)
+
+    def test_error_after_data(self):
+        """error sent after result is raised at the end."""
+        body = '{"result": {"data": [1, 2]}, "error_message": "late"}'
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                stream, response = make_stream(body, size)
+                items = []
+                with self.assertRaises(RecommendAPIError):
+                    for item in stream:
+                        items.append(item)
+                self.assertEqual(items, [1, 2])
+                self.assertTrue(response.closed)
+
+    def test_batch_errors(self):
+        """batch_error_list is raised as RecommendBatchErrorList."""
+        body = json.dumps({
+            'success': True,
+            'batch_error_list': [{'type': 'invalid', 'identifier': 'c1'}],
+            'result': {'data': []},
+        })
+        for size in CHUNK_SIZES:
+            with self.subTest(size=size):
+                with self.assertRaises(RecommendBatchErrorList) as cm:
+                    RecommendResultStream(StubResponse(body, size))
+                self.assertEqual(cm.exception.errors()[0].identifier, 'c1')
+
+    def test_missing_success(self):
+        """response without success is an error."""
+        stream, _ = make_stream('{"result": {"data": [1]}}', 4)
+        with self.assertRaises(RecommendAPIError):
+            list(stream)
+
+    def test_invalid_json(self):
+        """truncated or invalid body."""
+        for body in [
+            '{"success": true, "result": {"data": [1, 2',
+            '{"success": true, "result": {"data": [1 2]}}',
+            '["success"]',
+        ]:
+            for size in CHUNK_SIZES:
+                with self.subTest(body=body, size=size):
+                    with self.assertRaises(RecommendAPIError):
+                        stream, _ = make_stream(body, size)
+                        list(stream)
+
+
+def suite():
+    return unittest.defaultTestLoader.loadTestsFromTestCase(
+        ResultStreamTestCase
+    )
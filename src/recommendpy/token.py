@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+import time
 
 # from ...models.settings import SystemSettings
 from .exceptions import RecommendTokenError
@@ -11,35 +11,80 @@ REFRESH_LIFETIME_PERCENT = 50
 
 
 def get_current_timestamp():
-    return datetime.utcnow().replace(tzinfo=timezone.utc).timestamp()
+    return time.time()
 
 
 class RecommendAPIToken(object):
-    """RecommendAPIToken object."""
+    r"""
+    RecommendAPIToken object.
+
+    Expiration and refresh deadlines are computed once when ``expire_at``
+    or ``created_at`` are set, checks compare them with ``time.time()``.
+    The wall clock is used on purpose: the monotonic clock stops while
+    the host is suspended, the expiration date of the api does not.
+    """
+
+    __slots__ = (
+        'token', '_expire_at', '_created_at', '_expire_deadline',
+        '_refresh_deadline',
+    )
 
     def __init__(self, token=None, expire_at=None, created_at=None):
         self.token = token
-        self.expire_at = expire_at
+        self._expire_at = expire_at
+        self._created_at = created_at or get_current_timestamp()
+        self._update_deadlines()
+
+    def _update_deadlines(self):
+        if self._expire_at is None:
+            # no expiration date yet, consider the token expired
+            self._expire_deadline = self._refresh_deadline = float('-inf')
+            return
+        self._expire_deadline = self._expire_at
+        self._refresh_deadline = self.refresh_at
+
+    @property
+    def expire_at(self):
+        return self._expire_at
 
-        self.created_at = created_at or get_current_timestamp()
+    @expire_at.setter
+    def expire_at(self, value):
+        self._expire_at = value
+        self._update_deadlines()
+
+    @property
+    def created_at(self):
+        return self._created_at
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created_at = value
+        self._update_deadlines()
 
     @property
     def is_expired(self):
-        return get_current_timestamp() >= self.expire_at
+        return time.time() >= self._expire_deadline
 
     @property
     def life_time(self):
-        return self.expire_at - self.created_at
+        return self._expire_at - self._created_at
 
     @property
     def refresh_life_time(self):
         return self.life_time * REFRESH_LIFETIME_PERCENT / 100
 
+    @property
+    def refresh_at(self):
+        return self._created_at + self.refresh_life_time
+
+    @property
+    def refresh_in(self):
+        """Seconds left before the token needs refresh."""
+        return self._refresh_deadline - time.time()
+
     @property
     def need_refresh(self):
-        return get_current_timestamp() >= (
-            self.created_at + self.refresh_life_time
-        )
+        return time.time() >= self._refresh_deadline
 
     def set_from_dict(self, data, from_db=False):
         try:
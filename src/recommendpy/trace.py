@@ -0,0 +1,123 @@
+import reprlib
+
+__all__ = [
+    'RequestEvent',
+    'redact_args',
+    'trace_repr',
+]
+
+TRACE_BODY_SIZE = 1024
+
+# headers with credentials, their values are never logged
+SENSITIVE_HEADERS = frozenset([
+    'authorization', 'proxy-authorization', 'cookie', 'x-api-key',
+])
+REDACTED = '***'
+
+
+class TraceRepr(reprlib.Repr):
+    """``reprlib.Repr`` which never builds full repr of big bodies."""
+
+    def __init__(self, size=TRACE_BODY_SIZE):
+        super().__init__()
+        self.size = size
+        self.maxlevel = 4
+        self.maxlist = self.maxtuple = 10
+        self.maxdict = 20
+        self.maxstring = self.maxother = size
+
+    def repr_bytes(self, x, level):
+        if len(x) > self.maxstring:
+            return '{}...({} bytes)'.format(
+                repr(x[:self.maxstring]), len(x)
+            )
+        return repr(x)
+
+    def repr(self, x):
+        text = super().repr(x)
+        if len(text) > self.size:
+            return text[:self.size] + '...'
+        return text
+
+
+def trace_repr(value, size=TRACE_BODY_SIZE):
+    r"""
+    Return truncated repr of request or response body for logs.
+
+    Only the first items of long lists and dicts and the beginning of long
+    strings are formatted.
+
+    :param value: value to format (required).
+    :param size: max length of result. Defaults to ``1024``.
+    """
+    if size == TRACE_BODY_SIZE:
+        return _trace_repr.repr(value)
+    return TraceRepr(size).repr(value)
+
+
+_trace_repr = TraceRepr()
+
+
+def redact_args(args):
+    r"""
+    Return keyword arguments of request with credential headers masked.
+
+    :param args: keyword arguments of request (required).
+
+    :return: ``args`` or its copy with masked ``headers``.
+    """
+    headers = args.get('headers')
+    if not headers or not any(
+        name.lower() in SENSITIVE_HEADERS for name in headers
+    ):
+        return args
+    args = dict(args)
+    args['headers'] = {
+        name: REDACTED if name.lower() in SENSITIVE_HEADERS else value
+        for name, value in headers.items()
+    }
+    return args
+
+
+class RequestEvent(object):
+    """Structured trace of one api request."""
+
+    __slots__ = (
+        'method', 'endpoint', 'status', 'bytes_sent', 'bytes_received',
+        'duration', 'error', 'retries',
+    )
+
+    def __init__(
+        self, method, endpoint, status=None, bytes_sent=0,
+        bytes_received=None, duration=0, error=None, retries=0
+    ):
+        r"""
+        Initialize RequestEvent object.
+
+        :param method: http method of request (required).
+        :param endpoint: relative path of request (required).
+        :param status: http status of response. Defaults to ``None``.
+        :param bytes_sent: size of request body. Defaults to ``0``.
+        :param bytes_received: size of response body (``None`` if unknown).
+            Defaults to ``None``.
+        :param duration: duration of request in seconds. Defaults to ``0``.
+        :param error: exception raised by transport. Defaults to ``None``.
+        :param retries: count of previous attempts of the same request.
+            Defaults to ``0``.
+        """
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.duration = duration
+        self.error = error
+        self.retries = retries
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return '<RequestEvent {} {} {} {:.3f}s>'.format(
+            self.method.upper(), self.endpoint, self.status, self.duration
+        )